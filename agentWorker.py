@@ -0,0 +1,60 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script runs one or     ####
+#### more MCP agents as a standalone worker ####
+#### process, connected to the other        ####
+#### processes through the Redis broker.    ####
+####                                        ####
+################################################
+
+import sys
+import threading
+
+from clsConfigClient import clsConfigClient as cf
+
+import clsMCPBroker as t
+from clsDocumentationAgent import clsDocumentationAgent
+from clsTranslationAgent import clsTranslationAgent
+from clsResearchAgent import clsResearchAgent
+
+# Agent classes by their broker id
+AGENTS = {
+    "doc_agent": clsDocumentationAgent,
+    "translation_agent": clsTranslationAgent,
+    "research_agent": clsResearchAgent
+}
+
+def main(agent_ids):
+    if cf.conf['BROKER_BACKEND'] != 'redis':
+        print("Warning: BROKER_BACKEND is not 'redis' - this worker can't reach agents in other processes.")
+
+    # Each worker process keeps its own write-ahead log
+    broker = t.clsMCPBroker(wal_name="worker-" + "-".join(agent_ids))
+
+    agents = []
+    for agent_id in agent_ids:
+        agent = AGENTS[agent_id](agent_id=agent_id, broker=broker)
+        agents.append(agent)
+
+    for subscriber_id, publisher_id, message_type in cf.conf['BROKER_SUBSCRIPTIONS']:
+        broker.subscribe(subscriber_id, publisher_id, message_type)
+
+    for agent in agents:
+        agent.run()
+
+    broker.recover()
+
+    # Handlers run on the broker's dispatcher threads; keep the process alive
+    threading.Event().wait()
+
+if __name__ == "__main__":
+    # Usage: python agentWorker.py research_agent [translation_agent ...]
+    if len(sys.argv) < 2 or any(agent_id not in AGENTS for agent_id in sys.argv[1:]):
+        print(f"Usage: python agentWorker.py <agent_id> [<agent_id> ...]  (agents: {', '.join(AGENTS)})")
+        sys.exit(1)
+
+    main(sys.argv[1:])
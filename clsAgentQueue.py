@@ -0,0 +1,161 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from clsMCPMessage import clsMCPMessage
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# Bounded Priority Agent Queue
+# ----------------------------------------------------------------------------------
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "reject")
+
+class clsAgentQueue:
+    """Bounded agent queue with priority lanes, an overflow policy and depth/wait metrics"""
+
+    def __init__(self, maxsize=None, overflow=None, block_timeout=None, lanes=None,
+                 on_drop: Optional[Callable[[clsMCPMessage], None]] = None):
+        self.maxsize = maxsize if maxsize is not None else cf.conf['AGENT_QUEUE_MAXSIZE']
+        self.overflow = overflow or cf.conf['AGENT_QUEUE_OVERFLOW']
+        self.block_timeout = block_timeout if block_timeout is not None else cf.conf['AGENT_QUEUE_BLOCK_TIMEOUT']
+
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {self.overflow}")
+
+        # Lanes in priority order - the first lane is always served first
+        self.lanes: List[str] = list(lanes or cf.conf['QUEUE_PRIORITY_LANES'])
+        self.default_lane = cf.conf['QUEUE_DEFAULT_PRIORITY']
+        self.items: Dict[str, Deque[Tuple[float, clsMCPMessage]]] = {lane: deque() for lane in self.lanes}
+        self.size = 0
+
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+
+        self.stats = {
+            lane: {"enqueued": 0, "dequeued": 0, "dropped": 0, "rejected": 0, "max_depth": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for lane in self.lanes
+        }
+        self.recent_waits: Dict[str, Deque[float]] = {lane: deque(maxlen=1000) for lane in self.lanes}
+
+        # Told about every message the drop_oldest policy throws away, e.g. to ack it in the broker log
+        self.on_drop = on_drop
+
+    def _lane(self, message: clsMCPMessage) -> str:
+        lane = (message.metadata or {}).get("priority", self.default_lane)
+        return lane if lane in self.items else self.default_lane
+
+    def _drop_oldest(self, incoming_lane: str) -> Optional[clsMCPMessage]:
+        """Drop & return the oldest message of the lowest priority lane that has any, never one
+        of higher priority than incoming_lane (lock held)"""
+        for lane in reversed(self.lanes[self.lanes.index(incoming_lane):]):
+            if self.items[lane]:
+                _, dropped = self.items[lane].popleft()
+                self.size -= 1
+                self.stats[lane]["dropped"] += 1
+                return dropped
+        return None
+
+    def put(self, message: clsMCPMessage) -> None:
+        """Enqueue a message in its priority lane, applying the overflow policy when full"""
+        lane = self._lane(message)
+        dropped = None
+
+        with self.lock:
+            if self.size >= self.maxsize:
+                if self.overflow == "reject":
+                    self.stats[lane]["rejected"] += 1
+                    raise queue.Full(f"Agent queue full ({self.maxsize}), message {message.id} rejected")
+
+                if self.overflow == "drop_oldest":
+                    dropped = self._drop_oldest(lane)
+                    if dropped is None:
+                        # Only higher priority messages are queued - they keep their place
+                        self.stats[lane]["rejected"] += 1
+                        raise queue.Full(f"Agent queue full ({self.maxsize}) of higher priority messages, message {message.id} rejected")
+                else:
+                    deadline = time.monotonic() + self.block_timeout
+                    while self.size >= self.maxsize:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.stats[lane]["rejected"] += 1
+                            raise queue.Full(f"Agent queue full ({self.maxsize}) for {self.block_timeout}s, message {message.id} rejected")
+                        self.not_full.wait(remaining)
+
+            self.items[lane].append((time.monotonic(), message))
+            self.size += 1
+
+            stats = self.stats[lane]
+            stats["enqueued"] += 1
+            stats["max_depth"] = max(stats["max_depth"], len(self.items[lane]))
+
+            self.not_empty.notify()
+
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+
+    def get(self, timeout: Optional[float] = None) -> clsMCPMessage:
+        """Take the next message from the highest priority non-empty lane"""
+        with self.lock:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.size == 0:
+                if deadline is None:
+                    self.not_empty.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self.not_empty.wait(remaining)
+
+            for lane in self.lanes:
+                if self.items[lane]:
+                    enqueued_at, message = self.items[lane].popleft()
+                    break
+
+            self.size -= 1
+
+            wait = time.monotonic() - enqueued_at
+            stats = self.stats[lane]
+            stats["dequeued"] += 1
+            stats["total_wait"] += wait
+            stats["max_wait"] = max(stats["max_wait"], wait)
+            self.recent_waits[lane].append(wait)
+
+            self.not_full.notify()
+            return message
+
+    def qsize(self) -> int:
+        with self.lock:
+            return self.size
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-lane depth, throughput, drop/reject counters & wait times (seconds)"""
+        with self.lock:
+            metrics = {"depth": self.size, "maxsize": self.maxsize, "overflow": self.overflow, "lanes": {}}
+
+            for lane in self.lanes:
+                stats = dict(self.stats[lane])
+                waits = sorted(self.recent_waits[lane])
+
+                stats["depth"] = len(self.items[lane])
+                stats["avg_wait"] = stats.pop("total_wait") / stats["dequeued"] if stats["dequeued"] else 0.0
+                stats["p95_wait"] = waits[int(len(waits) * 0.95)] if waits else 0.0
+                metrics["lanes"][lane] = stats
+
+        return metrics
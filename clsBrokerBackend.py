@@ -0,0 +1,104 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import queue
+from typing import Any, Callable, Dict, Optional
+
+from clsMCPMessage import clsMCPMessage
+from clsAgentQueue import clsAgentQueue
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# MCP Broker Backends
+# ----------------------------------------------------------------------------------
+
+class clsBrokerBackend:
+    """Transport used by clsMCPBroker to hold & deliver each agent's messages"""
+
+    # Durable backends keep undelivered messages themselves, so the broker log doesn't re-enqueue them
+    durable = False
+
+    # Called with (agent_id, message) for messages a full queue throws away, so the broker can ack them
+    on_drop: Optional[Callable[[str, clsMCPMessage], None]] = None
+
+    def register(self, agent_id: str, reply_only: bool = False) -> None:
+        """Create the agent's message queue if it doesn't exist yet.
+
+        reply_only marks a queue that only takes replies to this process's requests.
+        """
+        raise NotImplementedError
+
+    def unregister(self, agent_id: str) -> None:
+        """Remove the agent's message queue, e.g. a reply queue when its process stops"""
+        pass
+
+    def has_agent(self, agent_id: str) -> bool:
+        """Check whether the agent has a queue (in any process sharing the backend)"""
+        raise NotImplementedError
+
+    def put(self, agent_id: str, message: clsMCPMessage) -> None:
+        """Enqueue a message for the agent"""
+        raise NotImplementedError
+
+    def get(self, agent_id: str, timeout: Optional[float] = None) -> Optional[clsMCPMessage]:
+        """Take the next message for the agent, blocking up to timeout (forever when None)"""
+        raise NotImplementedError
+
+    def ack(self, agent_id: str, message: clsMCPMessage) -> None:
+        """Confirm the message was handled so it won't be redelivered"""
+        pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth & wait time metrics per agent, where the backend tracks them"""
+        return {}
+
+class clsInMemoryBrokerBackend(clsBrokerBackend):
+    """Process local bounded priority queues - every agent has to live in the same process"""
+
+    def __init__(self):
+        self.message_queues: Dict[str, clsAgentQueue] = {}
+
+    def register(self, agent_id: str, reply_only: bool = False) -> None:
+        if agent_id not in self.message_queues:
+            self.message_queues[agent_id] = clsAgentQueue(on_drop=lambda message: self._dropped(agent_id, message))
+
+    def _dropped(self, agent_id: str, message: clsMCPMessage) -> None:
+        if self.on_drop is not None:
+            self.on_drop(agent_id, message)
+
+    def unregister(self, agent_id: str) -> None:
+        self.message_queues.pop(agent_id, None)
+
+    def has_agent(self, agent_id: str) -> bool:
+        return agent_id in self.message_queues
+
+    def put(self, agent_id: str, message: clsMCPMessage) -> None:
+        self.message_queues[agent_id].put(message)
+
+    def get(self, agent_id: str, timeout: Optional[float] = None) -> Optional[clsMCPMessage]:
+        try:
+            return self.message_queues[agent_id].get(timeout=timeout)
+        except (queue.Empty, KeyError):
+            return None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {agent_id: agent_queue.get_metrics() for agent_id, agent_queue in self.message_queues.items()}
+
+def create_backend() -> clsBrokerBackend:
+    """Create the backend selected by BROKER_BACKEND in the config"""
+    if cf.conf['BROKER_BACKEND'] == 'redis':
+        # Imported here so the in-memory setup doesn't need a Redis client
+        from clsRedisBrokerBackend import clsRedisBrokerBackend
+        return clsRedisBrokerBackend()
+
+    return clsInMemoryBrokerBackend()
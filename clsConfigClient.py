@@ -54,5 +54,100 @@ class clsConfigClient(object):
         'MAX_CNT' : 5,
         'OUT_DIR': 'data',
         'OUTPUT_DIR': 'output',
-        "DB_PATH": Curr_Path + sep + 'data' + sep
+        "DB_PATH": Curr_Path + sep + 'data' + sep,
+        'WINDOW_MAX_TOKENS': 400,
+        'WINDOW_MAX_SECONDS': 60,
+        'WINDOW_SPLIT_SENTENCE': 'Y',
+        'CONCURRENT_MODE': 'Y',
+        'TRANSLATION_CONCURRENCY': 8,
+        'DOCUMENTATION_CONCURRENCY': 4,
+        'GOOGLE_CONCURRENCY': 8,
+        'SARVAM_CONCURRENCY': 4,
+        'TRANSLATION_BATCH_SIZE': 32,
+        'GOOGLE_BATCH_MAX_ITEMS': 128,
+        'GOOGLE_BATCH_MAX_CHARS': 30000,
+        'SARVAM_BATCH_MAX_ITEMS': 16,
+        'SARVAM_BATCH_MAX_CHARS': 1000,
+        'SARVAM_TRANSLATE_URL': "https://api.sarvam.ai/translate",
+        'GOOGLE_TRANSLATE_URL': "https://translation.googleapis.com/language/translate/v2",
+        'HTTP_POOL_SIZE': 16,
+        'HTTP_CONNECT_TIMEOUT': 3.05,
+        'HTTP_READ_TIMEOUT': 30,
+        'HTTP_MAX_RETRIES': 3,
+        'HTTP_BACKOFF_BASE': 0.5,
+        'HTTP_BACKOFF_MAX': 8,
+        'CIRCUIT_FAILURE_THRESHOLD': 5,
+        'CIRCUIT_RESET_TIMEOUT': 30,
+        'TRANSLATION_CACHE_ENABLED': 'Y',
+        'TRANSLATION_CACHE_MAX_ITEMS': 50000,
+        'TRANSLATION_CACHE_DB': 'translation_cache.db',
+        'LANG_PROFILE_SAMPLE_SIZE': 12,
+        'LANG_PROFILE_MIN_AGREEMENT': 0.9,
+        'LANG_PROFILE_MAX_MIXED': 0.1,
+        'LANG_DETECTOR_PROFILE': 'restricted',
+        'LANG_DETECTOR_LANGUAGES': ['HINDI', 'BENGALI', 'PUNJABI', 'GUJARATI', 'TAMIL', 'TELUGU', 'MARATHI', 'URDU', 'ENGLISH',
+                                    'SPANISH', 'FRENCH', 'GERMAN', 'PORTUGUESE'],
+        'LANG_DETECTOR_MIN_CONFIDENCE': 0.3,
+        'LANG_DETECTOR_LOAD': 'lazy',
+        'BROKER_DISPATCH_WORKERS': 16,
+        'BROKER_AGENT_CONCURRENCY': 4,
+        'BROKER_PUMP_RETRY_SECONDS': 1,
+        'HISTORY_MAX_MESSAGES': 1000,
+        'HISTORY_MAX_CONVERSATIONS': 500,
+        'HISTORY_TTL_SECONDS': 3600,
+        'BROKER_BACKEND': 'memory',
+        'REDIS_URL': "redis://localhost:6379/0",
+        'REDIS_STREAM_PREFIX': 'mcp',
+        'REDIS_STREAM_MAXLEN': 100000,
+        'REDIS_REDELIVER_IDLE_MS': 60000,
+        'REDIS_BLOCK_MS': 5000,
+        'REDIS_REPLY_STREAM_TTL_SECONDS': 300,
+        'LOCAL_AGENTS': ['doc_agent', 'translation_agent', 'research_agent'],
+        'BROKER_SUBSCRIPTIONS': [
+            ('doc_agent', 'research_agent', 'research_response'),
+            ('research_agent', 'doc_agent', 'request'),
+            ('doc_agent', 'translation_agent', 'translation_response'),
+            ('translation_agent', 'doc_agent', 'translation_request')
+        ],
+        'BROKER_REQUEST_TIMEOUT': 120,
+        'TRANSLATION_VIA_BROKER': 'Y',
+        'AGENT_QUEUE_MAXSIZE': 1000,
+        'AGENT_QUEUE_OVERFLOW': 'block',
+        'AGENT_QUEUE_BLOCK_TIMEOUT': 30,
+        'QUEUE_PRIORITY_LANES': ['interactive', 'bulk'],
+        'QUEUE_DEFAULT_PRIORITY': 'interactive',
+        'WAL_ENABLED': 'N',
+        'WAL_SEGMENT_BYTES': 64 * 1024 * 1024,
+        'WAL_FSYNC_INTERVAL_MS': 50,
+        'WAL_FSYNC_BATCH': 256,
+        'WAL_COMPACT_SEGMENTS': 4,
+        'SUMMARY_CHUNK_TOKENS': 3000,
+        'SUMMARY_CONCURRENCY': 8,
+        'DOC_MEMORY_WINDOW': 6,
+        'DOC_MAX_SESSIONS': 100,
+        'LLM_CACHE_ENABLED': 'Y',
+        'LLM_CACHE_MAX_ITEMS': 5000,
+        'LLM_CACHE_DB': 'llm_cache.db',
+        'LLM_CACHE_TTL_SECONDS': 7 * 24 * 3600,
+        'LLM_CACHE_MAX_TEMPERATURE': 0.3,
+        'RESEARCH_POOL_SIZE': 4,
+        'RESEARCH_RESULT_TTL_SECONDS': 600,
+        'RESEARCH_RESULT_MAX_ITEMS': 1000,
+        'JOB_STORE': 'memory',
+        'JOB_WORKERS': 4,
+        'JOB_MAX_PENDING': 100,
+        'JOB_RETENTION_SECONDS': 3600,
+        'JOB_EVENT_HEARTBEAT_SECONDS': 15,
+        'JOB_EVENT_POLL_SECONDS': 0.25,
+        'VIDEO_CACHE_ENABLED': 'Y',
+        'VIDEO_CACHE_MAX_ITEMS': 100,
+        'VIDEO_CACHE_DB': 'video_cache.db',
+        'VIDEO_CACHE_TTL_SECONDS': 24 * 3600,
+        'VIDEO_CACHE_REVALIDATE_SECONDS': 600,
+        'VIDEO_CACHE_PIPELINE_KEYS': [
+            'WINDOW_MAX_TOKENS', 'WINDOW_MAX_SECONDS', 'WINDOW_SPLIT_SENTENCE',
+            'LANG_DETECTOR_PROFILE', 'LANG_DETECTOR_LANGUAGES', 'LANG_DETECTOR_MIN_CONFIDENCE',
+            'LANG_PROFILE_SAMPLE_SIZE', 'LANG_PROFILE_MIN_AGREEMENT', 'LANG_PROFILE_MAX_MIXED',
+            'SUMMARY_CHUNK_TOKENS', 'DOC_MEMORY_WINDOW'
+        ]
     }
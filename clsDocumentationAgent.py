@@ -11,21 +11,26 @@
 ####                                        ####
 ################################################
 
+import hashlib
+import threading
 import time
 import uuid
-from typing import Dict, List, Optional, Any, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Any, Union
 
 # Import LangChain components
 from langchain.agents import AgentExecutor
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.memory import ConversationBufferMemory 
+from langchain.memory import ConversationBufferWindowMemory
 from langchain_openai import ChatOpenAI
 from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
 from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
 
 from clsConfigClient import clsConfigClient as cf
 
-from clsSendMessageTool import clsSendMessageTool
+from clsSendMessageTool import clsSendMessageTool, current_conversation_id
+from clsLLMResponseCache import get_llm_cache
 import clsMCPBroker
 from clsMCPMessage import clsMCPMessage
 
@@ -51,6 +56,28 @@ if not SARVAM_API_KEY:
 # Documentation Agent (using LangChain)
 # ----------------------------------------------------------------------------------
 
+class clsDocumentationSession:
+    """Notes, memory & cached summaries of one video, so the agent can document many at once"""
+    
+    def __init__(self, conversation_id: str, memory_window: int):
+        self.conversation_id = conversation_id
+        self.video_notes: Dict[Any, Dict[str, Any]] = {}
+        self.key_points: List[str] = []
+        self.transcript_segments: List[Dict[str, Any]] = []
+        
+        # Bounded memory - each call sees only the last few exchanges of this video
+        self.memory = ConversationBufferWindowMemory(
+            k=memory_window,
+            memory_key="chat_history",
+            return_messages=True
+        )
+        
+        # Intermediate map-reduce summaries, keyed by level & chunk text
+        self.summaries: Dict[str, str] = {}
+        
+        # Segments are analysed concurrently
+        self.lock = threading.Lock()
+
 class clsDocumentationAgent:
     """Documentation Agent built with LangChain"""
     
@@ -60,9 +87,11 @@ class clsDocumentationAgent:
         self.broker.register_agent(agent_id)
         
         # Initialize LangChain components
+        self.model = "gpt-4-0125-preview"
+        self.temperature = 0.1
         self.llm = ChatOpenAI(
-            model="gpt-4-0125-preview",
-            temperature=0.1,
+            model=self.model,
+            temperature=self.temperature,
             api_key=OPENAI_API_KEY
         )
         
@@ -72,15 +101,13 @@ class clsDocumentationAgent:
         ]
         
         # Set up LLM with tools
+        self.tool_schema = [tool.tool_config for tool in self.tools]
         self.llm_with_tools = self.llm.bind(
-            tools=[tool.tool_config for tool in self.tools]
+            tools=self.tool_schema
         )
         
-        # Setup memory
-        self.memory = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True
-        )
+        # Repeated prompts (re-processed videos, shared segments) are answered from the cache
+        self.llm_cache = get_llm_cache()
         
         # Create prompt
         self.prompt = ChatPromptTemplate.from_messages([
@@ -103,7 +130,7 @@ class clsDocumentationAgent:
         self.agent = (
             {
                 "input": lambda x: x["input"],
-                "chat_history": lambda x: self.memory.load_memory_variables({})["chat_history"],
+                "chat_history": lambda x: x.get("chat_history", []),
                 "agent_scratchpad": lambda x: format_to_openai_tool_messages(x["intermediate_steps"]),
             }
             | self.prompt
@@ -111,46 +138,121 @@ class clsDocumentationAgent:
             | OpenAIToolsAgentOutputParser()
         )
         
-        # Create agent executor
+        # Create agent executor - memory is passed in per call, see _invoke
         self.agent_executor = AgentExecutor(
             agent=self.agent,
             tools=self.tools,
-            verbose=True,
-            memory=self.memory
+            verbose=True
         )
         
-        # Video data
-        self.current_conversation_id = None
-        self.video_notes = {}
-        self.key_points = []
-        self.transcript_segments = []
+        # Video data - one session per conversation, least recently started first out
+        self.sessions: "OrderedDict[str, clsDocumentationSession]" = OrderedDict()
+        self.sessions_lock = threading.Lock()
+        self.max_sessions = cf.conf['DOC_MAX_SESSIONS']
+        self.memory_window = cf.conf['DOC_MEMORY_WINDOW']
+        
+        # Concurrency settings for per-segment analysis
+        self.concurrent_mode = cf.conf['CONCURRENT_MODE'] == 'Y'
+        self.documentation_concurrency = cf.conf['DOCUMENTATION_CONCURRENCY']
+        
+        # Hierarchical summarization - note chunks are summarized in parallel, then merged
+        self.summary_chunk_tokens = cf.conf['SUMMARY_CHUNK_TOKENS']
+        self.summary_concurrency = cf.conf['SUMMARY_CONCURRENCY']
         
     def start_processing(self) -> str:
         """Start processing a new video"""
-        self.current_conversation_id = str(uuid.uuid4())
-        self.video_notes = {}
-        self.key_points = []
-        self.transcript_segments = []
+        conversation_id = str(uuid.uuid4())
+        self._open_session(conversation_id)
         
-        return self.current_conversation_id
+        return conversation_id
+    
+    def end_processing(self, conversation_id: str) -> None:
+        """Release a finished video's notes, memory & cached summaries"""
+        with self.sessions_lock:
+            self.sessions.pop(conversation_id, None)
     
-    def process_transcript(self, transcript_segments, conversation_id=None):
-        """Process a YouTube transcript"""
+    def _open_session(self, conversation_id: str) -> clsDocumentationSession:
+        """Get the conversation's session, creating it on first use"""
+        with self.sessions_lock:
+            session = self.sessions.get(conversation_id)
+            if session is None:
+                session = clsDocumentationSession(conversation_id, self.memory_window)
+                self.sessions[conversation_id] = session
+                
+                # Sessions that were never ended mustn't pile up
+                while len(self.sessions) > self.max_sessions:
+                    evicted_id, _ = self.sessions.popitem(last=False)
+                    print(f"Warning: documentation session {evicted_id} was never ended, evicting it")
+            return session
+    
+    def get_session(self, conversation_id: Optional[str]) -> Optional[clsDocumentationSession]:
+        """The conversation's session, or None once it has ended"""
+        with self.sessions_lock:
+            return self.sessions.get(conversation_id)
+    
+    def _invoke(self, session: Optional[clsDocumentationSession], text: str, cache: bool = True,
+                context: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Run the agent with the session's windowed memory, if the conversation is still open.
+        
+        Cached responses skip the tool calls the agent made the first time; pass cache=False
+        where those have to happen on every call.
+        
+        The memory window depends on the order concurrent calls finish in, so it's left out of
+        the cache key - context (e.g. the preceding segments) stands in for it there.
+        """
+        # Late messages for a finished video don't bring its session back
+        chat_history = session.memory.load_memory_variables({})["chat_history"] if session is not None else []
+        
+        prompt = "\n".join((context or []) + [text])
+        
+        # Research requests the agent sends from this call carry the session's conversation id
+        token = current_conversation_id.set(session.conversation_id if session is not None else None)
+        try:
+            output = self.llm_cache.get_or_call(
+                self.model,
+                self.temperature,
+                prompt,
+                lambda: self.agent_executor.invoke({"input": text, "chat_history": chat_history})["output"],
+                tools=self.tool_schema,
+                cache=cache
+            )
+        finally:
+            current_conversation_id.reset(token)
+        
+        if session is not None:
+            session.memory.save_context({"input": text}, {"output": output})
+        return {"input": text, "output": output}
+    
+    def process_transcript(self, transcript_segments, conversation_id=None, progress: Optional[Callable[..., None]] = None):
+        """Process a YouTube transcript, reporting progress(stage, done, total, event=...) as segments finish"""
         if not conversation_id:
             conversation_id = self.start_processing()
-        self.current_conversation_id = conversation_id
+        session = self._open_session(conversation_id)
+        progress = progress or (lambda *args, **kwargs: None)
         
         # Store transcript segments
-        self.transcript_segments = transcript_segments
+        session.transcript_segments = transcript_segments
+        total = len(transcript_segments)
         
-        # Process segments
+        # Process segments, concurrently when enabled; results are put back in timestamp order
         processed_segments = []
-        for segment in transcript_segments:
-            processed_result = self.process_segment(segment)
-            processed_segments.append(processed_result)
+        if self.concurrent_mode and total > 1:
+            with ThreadPoolExecutor(max_workers=self.documentation_concurrency) as executor:
+                futures = [executor.submit(self._safe_process_segment, segment, conversation_id) for segment in transcript_segments]
+                for future in as_completed(futures):
+                    processed_segments.append(future.result())
+                    progress("documentation", len(processed_segments), total, event={"segment": processed_segments[-1]})
+        else:
+            for segment in transcript_segments:
+                processed_segments.append(self._safe_process_segment(segment, conversation_id))
+                progress("documentation", len(processed_segments), total, event={"segment": processed_segments[-1]})
+        
+        processed_segments.sort(key=lambda x: x["timestamp"])
         
         # Generate summary
-        summary = self.generate_summary()
+        progress("summary", 0, 1)
+        summary = self.generate_summary(conversation_id)
+        progress("summary", 1, 1, event={"summary": summary})
         
         return {
             "processed_segments": processed_segments,
@@ -158,22 +260,45 @@ class clsDocumentationAgent:
             "conversation_id": conversation_id
         }
     
-    def process_segment(self, segment):
+    def _safe_process_segment(self, segment, conversation_id):
+        """Process a segment so that one failure doesn't abort the whole video"""
+        try:
+            return self.process_segment(segment, conversation_id)
+        except Exception as e:
+            print(f"Debug - Error analysing segment at {segment.get('start', 0)}: {str(e)}")
+            return {
+                "timestamp": segment.get("start", 0),
+                "text": segment.get("text", ""),
+                "analysis": "",
+                "error": f"Error processing segment: {str(e)}"
+            }
+    
+    def _segment_context(self, session: clsDocumentationSession, start) -> List[str]:
+        """Texts of the segments just before start, in timestamp order - the same on every run of the video"""
+        earlier = [segment for segment in session.transcript_segments if segment.get("start", 0) < start]
+        earlier.sort(key=lambda segment: segment.get("start", 0))
+        return [f"{segment.get('start', 0)}: {segment.get('text', '')}" for segment in earlier[-self.memory_window:]]
+    
+    def process_segment(self, segment, conversation_id):
         """Process individual transcript segment"""
+        session = self._open_session(conversation_id)
         text = segment.get("text", "")
         start = segment.get("start", 0)
         
         # Use LangChain agent to process the segment
-        result = self.agent_executor.invoke({
-            "input": f"Process this video transcript segment at timestamp {start}s: {text}. If research is needed, send a request to the research_agent."
-        })
+        result = self._invoke(
+            session,
+            f"Process this video transcript segment at timestamp {start}s: {text}. If research is needed, send a request to the research_agent.",
+            context=self._segment_context(session, start)
+        )
         
         # Update video notes
         timestamp = start
-        self.video_notes[timestamp] = {
-            "text": text,
-            "analysis": result["output"]
-        }
+        with session.lock:
+            session.video_notes[timestamp] = {
+                "text": text,
+                "analysis": result["output"]
+            }
         
         return {
             "timestamp": timestamp,
@@ -187,12 +312,13 @@ class clsDocumentationAgent:
             # Process research information received from Research Agent
             research_info = message.content.get("text", "")
             
-            result = self.agent_executor.invoke({
-                "input": f"Incorporate this research information into video analysis: {research_info}"
-            })
+            result = self._invoke(
+                self.get_session(message.conversation_id),
+                f"Incorporate this research information into video analysis: {research_info}"
+            )
             
             # Send acknowledgment back to Research Agent
-            response = clsMCPMessage(
+            response = clsMCPMessage.trusted(
                 sender=self.agent_id,
                 receiver=message.sender,
                 message_type="acknowledgment",
@@ -214,16 +340,20 @@ class clsDocumentationAgent:
                 original_text = translation_result.get("original_text", "")
                 language_info = translation_result.get("language", {})
                 
-                result = self.agent_executor.invoke({
-                    "input": f"Process this translated text: {text}\nOriginal language: {language_info.get('language', 'unknown')}\nOriginal text: {original_text}"
-                })
+                session = self.get_session(message.conversation_id)
+                result = self._invoke(
+                    session,
+                    f"Process this translated text: {text}\nOriginal language: {language_info.get('language', 'unknown')}\nOriginal text: {original_text}"
+                )
                 
                 # Update notes with translation information
-                for timestamp, note in self.video_notes.items():
-                    if note["text"] == original_text:
-                        note["translated_text"] = text
-                        note["language"] = language_info
-                        break
+                if session is not None:
+                    with session.lock:
+                        for timestamp, note in session.video_notes.items():
+                            if note["text"] == original_text:
+                                note["translated_text"] = text
+                                note["language"] = language_info
+                                break
             
             return None
         
@@ -232,22 +362,96 @@ class clsDocumentationAgent:
     def run(self):
         """Run the agent to listen for MCP messages"""
         print(f"Documentation Agent {self.agent_id} is running...")
+        
+        # The broker pushes messages to the handler, so an idle agent uses no CPU
+        self.broker.register_handler(self.agent_id, self.handle_mcp_message)
+    
+    def _estimate_tokens(self, text: str) -> int:
+        """Rough token count - same 4 characters per token heuristic as the transcript windower"""
+        return max(1, len(text) // 4)
+    
+    def _chunk(self, items: List[str], min_items: int = 1) -> List[List[str]]:
+        """Group consecutive items into chunks under the summary token budget"""
+        chunks = []
+        current = []
+        tokens = 0
+        
+        for item in items:
+            item_tokens = self._estimate_tokens(item)
+            # min_items keeps merge levels shrinking even when summaries are near the budget
+            if current and tokens + item_tokens > self.summary_chunk_tokens and len(current) >= min_items:
+                chunks.append(current)
+                current = []
+                tokens = 0
+            current.append(item)
+            tokens += item_tokens
+        
+        if current:
+            chunks.append(current)
+        
+        return chunks
+    
+    def _summarize_chunk(self, session: clsDocumentationSession, level: int, text: str) -> str:
+        """Summarize one chunk of notes (level 0) or partial summaries (higher levels), cached per conversation"""
+        key = hashlib.sha1(f"{level}\n{text}".encode("utf-8")).hexdigest()
+        
+        with session.lock:
+            cached = session.summaries.get(key)
+        if cached is not None:
+            return cached
+        
+        if level == 0:
+            instruction = "Summarize these timestamped notes from one part of a YouTube video. Keep the key points, topics and their timestamps:"
+        else:
+            instruction = "Merge these summaries of consecutive parts of a YouTube video into one summary, keeping the key points and topics in order:"
+        
+        prompt = f"{instruction}\n{text}"
+        summary = self.llm_cache.get_or_call(
+            self.model,
+            self.temperature,
+            prompt,
+            lambda: self.llm.invoke(prompt).content
+        )
+        
+        with session.lock:
+            session.summaries[key] = summary
+        
+        return summary
+    
+    def _reduce_notes(self, session: clsDocumentationSession, notes: List[str]) -> str:
+        """Map-reduce the notes until they fit in one chunk; levels grow with log(video length)"""
+        items = notes
+        level = 0
+        
         while True:
-            message = self.broker.get_message(self.agent_id, timeout=1)
-            if message:
-                self.handle_mcp_message(message)
-            time.sleep(0.1)
+            chunks = self._chunk(items, min_items=1 if level == 0 else 2)
+            if len(chunks) == 1:
+                return "\n".join(chunks[0])
+            
+            print(f"Debug - Summary level {level}: summarizing {len(items)} items in {len(chunks)} chunks")
+            
+            texts = ["\n".join(chunk) for chunk in chunks]
+            with ThreadPoolExecutor(max_workers=self.summary_concurrency) as executor:
+                items = list(executor.map(lambda text: self._summarize_chunk(session, level, text), texts))
+            
+            level += 1
     
-    def generate_summary(self) -> str:
+    def generate_summary(self, conversation_id: str) -> str:
         """Generate a summary of the video"""
-        if not self.video_notes:
+        session = self.get_session(conversation_id)
+        if session is None or not session.video_notes:
             return "No video data available to summarize."
         
-        all_notes = "\n".join([f"{ts}: {note['text']}" for ts, note in self.video_notes.items()])
+        with session.lock:
+            notes = [f"{ts}: {note['text']}" for ts, note in sorted(session.video_notes.items())]
+        
+        # Short videos go through as is; long ones are condensed to partial summaries first
+        all_notes = self._reduce_notes(session, notes)
         
-        result = self.agent_executor.invoke({
-            "input": f"Generate a concise summary of this YouTube video, including key points and topics:\n{all_notes}"
-        })
+        result = self._invoke(
+            session,
+            f"Generate a concise summary of this YouTube video, including key points and topics:\n{all_notes}"
+        )
         
         return result["output"]
 
@@ -0,0 +1,140 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script runs the video  ####
+#### processing requests as background jobs ####
+#### on a bounded worker pool, so the API   ####
+#### returns a task ID straight away.       ####
+####                                        ####
+################################################
+
+import asyncio
+import json
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from clsJobStore import clsJobStore, create_job_store, FINISHED_STATES
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# Background Job Manager
+# ----------------------------------------------------------------------------------
+
+class clsJobManager:
+    """Runs submitted jobs on a bounded worker pool & tracks their status in a job store"""
+
+    def __init__(self, store: Optional[clsJobStore] = None):
+        self.store = store or create_job_store()
+        self.workers = ThreadPoolExecutor(
+            max_workers=cf.conf['JOB_WORKERS'],
+            thread_name_prefix="video-job"
+        )
+
+        # Jobs queued or running - submissions past the cap are turned away, not queued forever
+        self.max_pending = cf.conf['JOB_MAX_PENDING']
+        self.pending = 0
+        self.lock = threading.Lock()
+
+        # Idle event streams send a comment this often, so proxies keep the connection open
+        self.heartbeat = cf.conf['JOB_EVENT_HEARTBEAT_SECONDS']
+        self.poll_seconds = cf.conf['JOB_EVENT_POLL_SECONDS']
+
+    def submit(self, task: Callable[..., Any], *args, **kwargs) -> str:
+        """Queue task(*args, progress=callback, **kwargs) & return its task ID straight away.
+
+        The task calls progress(stage, done, total) & passes event=payload to also
+        publish the payload on the job's event stream.
+
+        Raises queue.Full when JOB_MAX_PENDING jobs are already queued or running.
+        """
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise queue.Full(f"Too many jobs in progress ({self.max_pending}), try again later")
+            self.pending += 1
+
+        task_id = str(uuid.uuid4())
+        try:
+            self.store.save({
+                "task_id": task_id,
+                "status": "queued",
+                "progress": {"stage": "queued", "done": 0, "total": 0},
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "result": None,
+                "error": None
+            })
+
+            self.workers.submit(self._run, task_id, task, args, kwargs)
+        except Exception:
+            # The job never reached a worker, so it mustn't keep holding a slot (e.g. while Redis is down)
+            with self.lock:
+                self.pending -= 1
+            raise
+
+        return task_id
+
+    def _run(self, task_id: str, task: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        def progress(stage: str, done: int = 0, total: int = 0, event: Optional[Dict[str, Any]] = None) -> None:
+            self.store.update(task_id, progress={"stage": stage, "done": done, "total": total})
+            if event is not None:
+                self.store.append_event(task_id, stage, event)
+
+        try:
+            # Inside the try, so a failed store write still frees the slot & fails the job
+            self.store.update(task_id, status="running", started=time.time())
+            result = task(*args, progress=progress, **kwargs)
+            self.store.update(task_id, status="completed", finished=time.time(), result=result)
+            self.store.append_event(task_id, "completed", {"task_id": task_id})
+        except Exception as e:
+            print(f"Error: job {task_id} failed: {str(e)}")
+            self.store.update(task_id, status="failed", finished=time.time(), error=str(e))
+            self.store.append_event(task_id, "failed", {"task_id": task_id, "error": str(e)})
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """The job's record, or None when unknown or expired"""
+        return self.store.get(task_id)
+
+    def get_status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """The job's record without its result, for polling"""
+        job = self.get(task_id)
+        if job is not None:
+            job.pop("result", None)
+        return job
+
+    async def stream_events(self, task_id: str, offset: int = 0) -> AsyncIterator[str]:
+        """Server-Sent Events for the job from offset on, ending after it completes or fails.
+
+        Waits on the event loop between short store reads, so open streams hold no threads.
+        """
+        last_sent = time.monotonic()
+        while True:
+            # Store reads can be network calls (Redis) - run them off the event loop, without waiting
+            events = await asyncio.to_thread(self.store.get_events, task_id, offset)
+            if not events:
+                if time.monotonic() - last_sent >= self.heartbeat:
+                    # The job expired while the client was connected
+                    if await asyncio.to_thread(self.store.get, task_id) is None:
+                        return
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                await asyncio.sleep(self.poll_seconds)
+                continue
+
+            for event in events:
+                # The id lets a reconnecting client resume with Last-Event-ID
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+                offset = event["id"] + 1
+                if event["event"] in FINISHED_STATES:
+                    return
+            last_sent = time.monotonic()
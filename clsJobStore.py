@@ -0,0 +1,115 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script keeps the state ####
+#### of the background video processing     ####
+#### jobs, so the API can report their      ####
+#### status, progress & results.            ####
+####                                        ####
+################################################
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# Job Stores
+# ----------------------------------------------------------------------------------
+
+# Jobs in these states never change again & can be expired
+FINISHED_STATES = ("completed", "failed")
+
+class clsJobStore:
+    """Where clsJobManager keeps job records (plain JSON serialisable dicts keyed by task_id)"""
+
+    def save(self, job: Dict[str, Any]) -> None:
+        """Create or replace a job record"""
+        raise NotImplementedError
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of the job record, or None when unknown or expired"""
+        raise NotImplementedError
+
+    def update(self, task_id: str, **fields) -> None:
+        """Merge fields into an existing job record"""
+        job = self.get(task_id)
+        if job is not None:
+            job.update(fields)
+            self.save(job)
+
+    def append_event(self, task_id: str, event: str, data: Dict[str, Any]) -> int:
+        """Add to the job's event log & return the event's id (its offset in the log)"""
+        raise NotImplementedError
+
+    def get_events(self, task_id: str, offset: int, timeout: float = 0) -> List[Dict[str, Any]]:
+        """Events from offset on, waiting up to timeout seconds when there are none yet"""
+        raise NotImplementedError
+
+class clsInMemoryJobStore(clsJobStore):
+    """Process local job records - finished jobs are dropped after JOB_RETENTION_SECONDS"""
+
+    def __init__(self):
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.events: Dict[str, List[Dict[str, Any]]] = {}
+        self.retention = cf.conf['JOB_RETENTION_SECONDS']
+        self.lock = threading.Lock()
+        self.events_added = threading.Condition(self.lock)
+
+    def _expire(self) -> None:
+        """Drop finished jobs past the retention period (lock held)"""
+        now = time.time()
+        for task_id in [task_id for task_id, job in self.jobs.items()
+                        if job["status"] in FINISHED_STATES and now - (job.get("finished") or now) > self.retention]:
+            del self.jobs[task_id]
+            self.events.pop(task_id, None)
+
+    def save(self, job: Dict[str, Any]) -> None:
+        with self.lock:
+            if job["task_id"] not in self.jobs:
+                self._expire()
+            self.jobs[job["task_id"]] = copy.deepcopy(job)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            job = self.jobs.get(task_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def update(self, task_id: str, **fields) -> None:
+        # Merged in place, so concurrent progress & status updates don't overwrite each other
+        with self.lock:
+            job = self.jobs.get(task_id)
+            if job is not None:
+                job.update(copy.deepcopy(fields))
+
+    def append_event(self, task_id: str, event: str, data: Dict[str, Any]) -> int:
+        with self.lock:
+            events = self.events.setdefault(task_id, [])
+            events.append({"id": len(events), "event": event, "data": copy.deepcopy(data)})
+            self.events_added.notify_all()
+            return len(events) - 1
+
+    def get_events(self, task_id: str, offset: int, timeout: float = 0) -> List[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while len(self.events.get(task_id, [])) <= offset:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self.events_added.wait(remaining)
+            return copy.deepcopy(self.events[task_id][offset:])
+
+def create_job_store() -> clsJobStore:
+    """Create the job store selected by JOB_STORE in the config"""
+    if cf.conf['JOB_STORE'] == 'redis':
+        # Imported here so the in-memory setup doesn't need a Redis client
+        from clsRedisJobStore import clsRedisJobStore
+        return clsRedisJobStore()
+
+    return clsInMemoryJobStore()
@@ -0,0 +1,90 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import hashlib
+import json
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional
+
+from clsTwoTierCache import clsTwoTierCache
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# LLM Response Cache
+# ----------------------------------------------------------------------------------
+
+# Shared across agents so they reuse one memory tier & database connection
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+def get_llm_cache():
+    """Return the process wide LLM response cache, creating it on first use"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = clsLLMResponseCache()
+    return _shared_cache
+
+class clsLLMResponseCache:
+    """Exact-match cache of LLM responses keyed by model, temperature, normalized prompt & tool schema"""
+
+    def __init__(self):
+        self.max_temperature = cf.conf['LLM_CACHE_MAX_TEMPERATURE']
+
+        # Memory LRU + SQLite under DB_PATH, entries expire after the TTL
+        self.cache = None
+        if cf.conf['LLM_CACHE_ENABLED'] == 'Y':
+            self.cache = clsTwoTierCache(
+                name="llm_cache",
+                max_items=cf.conf['LLM_CACHE_MAX_ITEMS'],
+                db_file=cf.conf['LLM_CACHE_DB'],
+                ttl_seconds=cf.conf['LLM_CACHE_TTL_SECONDS']
+            )
+
+    def key(self, model: str, temperature: float, prompt: str, tools: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Hash of the model settings, the whitespace normalized prompt & the tool schema"""
+        normalized = " ".join(unicodedata.normalize("NFC", prompt).split())
+        schema = json.dumps(tools or [], sort_keys=True)
+        raw = "|".join([model, f"{temperature:.3f}", schema, normalized])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def cacheable(self, temperature: float, cache: bool = True) -> bool:
+        """Sampling above the temperature cap is non-deterministic, so it's never cached"""
+        return self.cache is not None and cache and temperature <= self.max_temperature
+
+    def get_or_call(self, model: str, temperature: float, prompt: str, call: Callable[[], str],
+                    tools: Optional[List[Dict[str, Any]]] = None, cache: bool = True) -> str:
+        """Return the cached response for this exact call, or make the call & cache its response.
+
+        Pass cache=False for calls whose side effects (e.g. tool calls) must happen every time.
+        """
+        if not self.cacheable(temperature, cache):
+            return call()
+
+        key = self.key(model, temperature, prompt, tools)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = call()
+
+        # Empty responses are usually failures - leave them to be retried
+        if response:
+            self.cache.put(key, response)
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """LLM cache hit/miss/eviction counters"""
+        return self.cache.get_stats() if self.cache is not None else {}
@@ -11,6 +11,8 @@
 ####                                        ####
 ################################################
 
+import threading
+
 # Import language detection library
 from lingua import Language, LanguageDetectorBuilder
 
@@ -20,12 +22,35 @@ from clsConfigClient import clsConfigClient as cf
 # Language Detection
 # ----------------------------------------------------------------------------------
 
+# One detector per process, shared by every agent
+_shared_detector = None
+_shared_lock = threading.Lock()
+
+def get_language_detector():
+    """Return the process wide language detector, creating it on first use"""
+    global _shared_detector
+    if _shared_detector is None:
+        with _shared_lock:
+            if _shared_detector is None:
+                _shared_detector = clsLanguageDetector()
+    return _shared_detector
+
 class clsLanguageDetector:
     """Detect language using Lingua library with support for mixed language content"""
     
-    def __init__(self):
-        # Initialize language detector with high accuracy languages
-        self.detector = LanguageDetectorBuilder.from_all_languages().build()
+    def __init__(self, profile=None, eager=None):
+        # "restricted" only loads the configured languages, "all" loads every Lingua model
+        self.profile = profile or cf.conf['LANG_DETECTOR_PROFILE']
+        self.languages = [getattr(Language, name) for name in cf.conf['LANG_DETECTOR_LANGUAGES']]
+        self.min_confidence = cf.conf['LANG_DETECTOR_MIN_CONFIDENCE']
+        
+        if eager is None:
+            eager = cf.conf['LANG_DETECTOR_LOAD'] == 'eager'
+        self.eager = eager
+        
+        # The Lingua detector is built lazily on first use, or during warmup
+        self._detector = None
+        self._detector_lock = threading.Lock()
         
         # Define Indian languages for special handling
         self.indian_languages = {
@@ -51,18 +76,64 @@ class clsLanguageDetector:
             Language.URDU: "ur-IN",
             Language.ENGLISH: "en-IN"
         }
-    
-    def detect(self, text):
-        """Detect the language of the given text with support for mixed language content"""
-        if not text:
-            return {"language": "unknown", "is_indian": False, "language_code": "unknown", "is_mixed": False, "languages": []}
         
-        # Get language probabilities for more detailed analysis
-        confidences = self.detector.compute_language_confidence_values(text)
+        # Cache of (name, is_indian, language_code) per Lingua language
+        self.language_descriptions = {}
+        
+        # Map YouTube transcript language codes (e.g. "hi", "en-GB") to Lingua languages
+        self.transcript_language_map = {
+            code.split('-')[0]: language for language, code in self.language_code_map.items()
+        }
+        
+        # Transcript profiling settings
+        self.profile_sample_size = cf.conf['LANG_PROFILE_SAMPLE_SIZE']
+        self.profile_min_agreement = cf.conf['LANG_PROFILE_MIN_AGREEMENT']
+        self.profile_max_mixed = cf.conf['LANG_PROFILE_MAX_MIXED']
         
+        if self.eager:
+            self.warmup()
+    
+    @property
+    def detector(self):
+        """Lingua detector for the configured profile, built on first access"""
+        if self._detector is None:
+            with self._detector_lock:
+                if self._detector is None:
+                    if self.profile == "all":
+                        builder = LanguageDetectorBuilder.from_all_languages()
+                    else:
+                        builder = LanguageDetectorBuilder.from_languages(*self.languages)
+                    
+                    if self.eager:
+                        builder = builder.with_preloaded_language_models()
+                    
+                    self._detector = builder.build()
+        return self._detector
+    
+    def warmup(self):
+        """Build the detector & load its models up front, e.g. during application startup"""
+        self.detector.compute_language_confidence_values_in_parallel(
+            ["warmup", "वार्मअप"]
+        )
+    
+    def _describe(self, language):
+        """Name, Indian flag & language code for a Lingua language (memoized)"""
+        description = self.language_descriptions.get(language)
+        if description is None:
+            name = str(language).split('.')[1]
+            description = (name, language in self.indian_languages, self.language_code_map.get(language, name.lower()))
+            self.language_descriptions[language] = description
+        return description
+    
+    def _build_result(self, confidences):
+        """Build the detection result from Lingua confidence values"""
         # Sort by confidence scores
         sorted_confidences = sorted(confidences, key=lambda x: x.value, reverse=True)
         
+        # A restricted model can't name languages outside its set - report those as "other"
+        if self.profile != "all" and sorted_confidences and sorted_confidences[0].value < self.min_confidence:
+            return self._other_result(sorted_confidences[0].value)
+        
         # Initialize result
         result = {"is_mixed": False, "languages": []}
         
@@ -79,12 +150,10 @@ class clsLanguageDetector:
                 # Get top 3 languages with significant confidence (> 10%)
                 for conf in sorted_confidences[:3]:
                     if conf.value > 0.1:  # Only include languages with significant presence
-                        language = conf.language
-                        is_indian = language in self.indian_languages
-                        language_code = self.language_code_map.get(language, str(language).split('.')[1].lower())
+                        name, is_indian, language_code = self._describe(conf.language)
                         
                         result["languages"].append({
-                            "language": str(language).split('.')[1],
+                            "language": name,
                             "is_indian": is_indian,
                             "language_code": language_code,
                             "confidence": conf.value
@@ -92,10 +161,7 @@ class clsLanguageDetector:
         
         # Get most likely language for main result fields
         if sorted_confidences:
-            primary_language = sorted_confidences[0].language
-            result["language"] = str(primary_language).split('.')[1]
-            result["is_indian"] = primary_language in self.indian_languages
-            result["language_code"] = self.language_code_map.get(primary_language, str(primary_language).split('.')[1].lower())
+            result["language"], result["is_indian"], result["language_code"] = self._describe(sorted_confidences[0].language)
             
             # Add detected languages if not already set
             if not result["languages"]:
@@ -108,5 +174,167 @@ class clsLanguageDetector:
             
             return result
         else:
-            return {"language": "unknown", "is_indian": False, "language_code": "unknown", "is_mixed": False, "languages": []}
+            return self._unknown_result()
+    
+    def _unknown_result(self):
+        return {"language": "unknown", "is_indian": False, "language_code": "unknown", "is_mixed": False, "languages": []}
+    
+    def _other_result(self, confidence):
+        """Result for text outside the restricted language set (translated with source auto-detection)"""
+        other = {"language": "OTHER", "is_indian": False, "language_code": "other"}
+        return {**other, "is_mixed": False, "languages": [{**other, "confidence": confidence}]}
+    
+    def detect(self, text):
+        """Detect the language of the given text with support for mixed language content"""
+        if not text:
+            return self._unknown_result()
+        
+        # Get language probabilities for more detailed analysis
+        confidences = self.detector.compute_language_confidence_values(text)
+        
+        return self._build_result(confidences)
+    
+    def detect_batch(self, texts):
+        """Detect the language of many texts in one parallel Lingua call; results keep input order"""
+        results = [None] * len(texts)
+        
+        # Empty texts never reach the detector
+        pending = [idx for idx, text in enumerate(texts) if text]
+        for idx, text in enumerate(texts):
+            if not text:
+                results[idx] = self._unknown_result()
+        
+        if pending:
+            # Lingua spreads the texts over all cores outside the GIL
+            all_confidences = self.detector.compute_language_confidence_values_in_parallel(
+                [texts[idx] for idx in pending]
+            )
+            
+            for idx, confidences in zip(pending, all_confidences):
+                results[idx] = self._build_result(confidences)
+        
+        return results
+    
+    def _uniform_info(self, language, confidence):
+        """Language info for a text known to be in a single language"""
+        name, is_indian, language_code = self._describe(language)
+        return {
+            "language": name,
+            "is_indian": is_indian,
+            "language_code": language_code,
+            "is_mixed": False,
+            "languages": [{
+                "language": name,
+                "is_indian": is_indian,
+                "language_code": language_code,
+                "confidence": confidence
+            }]
+        }
+    
+    def profile_transcript(self, texts, transcript_language=None, auto_generated=True):
+        """Build a transcript level language profile from YouTube metadata plus sampled detection"""
+        metadata_language = None
+        if transcript_language:
+            # A label we can't map (e.g. "ja") still counts - it disagrees with any supported language
+            metadata_language = self.transcript_language_map.get(transcript_language.split('-')[0].lower(), "OTHER")
+        
+        # Evenly spaced sample of the non-empty texts
+        candidates = [text for text in texts if text]
+        step = max(1, len(candidates) // max(1, self.profile_sample_size))
+        samples = candidates[::step][:self.profile_sample_size]
+        
+        profile = {
+            "uniform": False,
+            "transcript_language": transcript_language,
+            "auto_generated": auto_generated,
+            "sampled": len(samples),
+            "agreement": 0.0,
+            "mixed": 0.0,
+            "language_info": None
+        }
+        
+        if not samples:
+            # Nothing to sample - only a manual transcript's label can be trusted
+            if metadata_language not in (None, "OTHER") and not auto_generated:
+                profile["uniform"] = True
+                profile["agreement"] = 1.0
+                profile["language_info"] = self._uniform_info(metadata_language, 1.0)
+            return profile
+        
+        # Majority primary language among the samples, judged as detect_batch would -
+        # low confidence ones vote "other" & mixed ones are counted
+        votes = {}
+        mixed = 0
+        for confidences in self.detector.compute_language_confidence_values_in_parallel(samples):
+            if confidences:
+                result = self._build_result(confidences)
+                if result["is_mixed"]:
+                    mixed += 1
+                vote = "OTHER" if result["language"] == "OTHER" else max(confidences, key=lambda x: x.value).language
+                votes[vote] = votes.get(vote, 0) + 1
+        
+        if not votes:
+            return profile
+        
+        majority_language, count = max(votes.items(), key=lambda x: x[1])
+        agreement = count / len(samples)
+        profile["agreement"] = agreement
+        profile["mixed"] = mixed / len(samples)
+        
+        # Only a supported language can be applied to every window; a label that disagrees
+        # with detection, or code-mixed samples, send the transcript to per-window detection
+        supported = majority_language != "OTHER" and (self.profile == "all" or majority_language in self.languages)
+        if (supported and agreement >= self.profile_min_agreement and profile["mixed"] <= self.profile_max_mixed
+                and metadata_language in (None, majority_language)):
+            profile["uniform"] = True
+            profile["language_info"] = self._uniform_info(majority_language, agreement)
+        
+        return profile
+
+# ----------------------------------------------------------------------------------
+# Benchmark: memory & accuracy of the detector profiles
+# ----------------------------------------------------------------------------------
 
+BENCHMARK_SAMPLES = [
+    ("HINDI", "मुझे आज बाजार जाना है और कुछ सब्ज़ियाँ खरीदनी हैं।"),
+    ("BENGALI", "আমি আজ বাজারে যাব এবং কিছু সবজি কিনব।"),
+    ("PUNJABI", "ਮੈਂ ਅੱਜ ਬਾਜ਼ਾਰ ਜਾਣਾ ਹੈ ਅਤੇ ਕੁਝ ਸਬਜ਼ੀਆਂ ਖਰੀਦਣੀਆਂ ਹਨ।"),
+    ("GUJARATI", "મારે આજે બજારમાં જવું છે અને થોડી શાકભાજી ખરીદવી છે."),
+    ("TAMIL", "நான் இன்று சந்தைக்குச் சென்று சில காய்கறிகளை வாங்க வேண்டும்."),
+    ("TELUGU", "నేను ఈ రోజు మార్కెట్‌కు వెళ్లి కొన్ని కూరగాయలు కొనాలి."),
+    ("MARATHI", "मला आज बाजारात जाऊन काही भाज्या विकत घ्यायच्या आहेत."),
+    ("URDU", "مجھے آج بازار جا کر کچھ سبزیاں خریدنی ہیں۔"),
+    ("ENGLISH", "I need to go to the market today and buy some vegetables."),
+]
+
+def _benchmark_profile(profile, output):
+    """Run in a child process so the resident memory of each profile is measured on its own"""
+    import time
+    import resource
+    
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.time()
+    
+    detector = clsLanguageDetector(profile=profile, eager=True)
+    load_seconds = time.time() - started
+    
+    results = detector.detect_batch([text for _, text in BENCHMARK_SAMPLES])
+    correct = sum(1 for (expected, _), result in zip(BENCHMARK_SAMPLES, results) if result["language"] == expected)
+    
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    output.put({
+        "profile": profile,
+        "load_seconds": round(load_seconds, 2),
+        "rss_growth_mb": round((after - before) / 1024, 1),
+        "accuracy": correct / len(BENCHMARK_SAMPLES)
+    })
+
+if __name__ == "__main__":
+    import multiprocessing
+    
+    output = multiprocessing.Queue()
+    for profile in ("all", "restricted"):
+        worker = multiprocessing.Process(target=_benchmark_profile, args=(profile, output))
+        worker.start()
+        print(output.get())
+        worker.join()
@@ -12,61 +12,508 @@
 ################################################
 
 
+import asyncio
+import heapq
 import queue
-from typing import Dict, List, Optional, Any, Union
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, FrozenSet, List, Optional, Any, Set, Tuple, Union
 
 from clsMCPMessage import clsMCPMessage
+from clsBrokerBackend import clsBrokerBackend, create_backend
+from clsMCPWriteAheadLog import clsMCPWriteAheadLog, RECORD_PUBLISH, RECORD_ACK, RECORD_CLOSE
 from clsConfigClient import clsConfigClient as cf
 
 # ----------------------------------------------------------------------------------
 # Message-Chaining Protocol (MCP) Implementation
 # ----------------------------------------------------------------------------------
 
+# Matches any publisher or message type in a subscription
+WILDCARD = "*"
+
 
 class clsMCPBroker:
     """Message broker for MCP protocol communication between agents"""
     
-    def __init__(self):
-        self.message_queues: Dict[str, queue.Queue] = {}
-        self.subscribers: Dict[str, List[str]] = {}
-        self.conversation_history: Dict[str, List[clsMCPMessage]] = {}
+    def __init__(self, backend: Optional[clsBrokerBackend] = None, wal_name: str = "broker"):
+        # Pluggable queue transport - in-memory or Redis Streams, per BROKER_BACKEND
+        self.backend = backend or create_backend()
+        
+        # Messages dropped by a full queue are never delivered - ack them so recovery doesn't bring them back
+        self.backend.on_drop = self._log_ack
+        
+        # Optional write-ahead log of publishes, acks & closes - opened & replayed by recover()
+        self.wal: Optional[clsMCPWriteAheadLog] = None
+        self.wal_name = wal_name
+        
+        # Routing index: (publisher, message_type) -> subscribers, "*" matching any value
+        self.routes: Dict[Tuple[str, str], Set[str]] = {}
+        self.route_cache: Dict[Tuple[str, str], FrozenSet[str]] = {}
+        self.routes_lock = threading.Lock()
+        
+        # Conversation history, ordered by last activity so the oldest conversations go first
+        self.conversation_history: "OrderedDict[str, Deque[clsMCPMessage]]" = OrderedDict()
+        self.conversation_touched: Dict[str, float] = {}
+        self.history_lock = threading.Lock()
+        self.history_max_messages = cf.conf['HISTORY_MAX_MESSAGES']
+        self.history_max_conversations = cf.conf['HISTORY_MAX_CONVERSATIONS']
+        self.history_ttl = cf.conf['HISTORY_TTL_SECONDS']
+        self.history_stats = {"trimmed_messages": 0, "evicted_conversations": 0, "expired_conversations": 0, "closed_conversations": 0}
+        
+        # Push based delivery - handlers run on a shared dispatcher pool
+        self.handlers: Dict[str, Callable[[clsMCPMessage], Any]] = {}
+        self.pumps: Dict[str, threading.Thread] = {}
+        self.dispatcher = ThreadPoolExecutor(
+            max_workers=cf.conf['BROKER_DISPATCH_WORKERS'],
+            thread_name_prefix="mcp-dispatch"
+        )
+        self.agent_concurrency = cf.conf['BROKER_AGENT_CONCURRENCY']
+        self.pump_retry_seconds = cf.conf['BROKER_PUMP_RETRY_SECONDS']
+        
+        # Request/reply correlation - futures keyed by the request's message id
+        self.pending: Dict[str, Future] = {}
+        self.pending_deadlines: List[Any] = []
+        self.pending_lock = threading.Condition()
+        self.request_timeout = cf.conf['BROKER_REQUEST_TIMEOUT']
+        self.timeout_sweeper: Optional[threading.Thread] = None
+    
+    def register_agent(self, agent_id: str, reply_only: bool = False) -> None:
+        """Register an agent with the broker (reply_only for a process's own reply queue)"""
+        self.backend.register(agent_id, reply_only)
+    
+    def unregister_agent(self, agent_id: str) -> None:
+        """Stop delivering to an agent & remove its queue, e.g. a reply queue at shutdown"""
+        self.handlers.pop(agent_id, None)
+        self.pumps.pop(agent_id, None)
+        self.backend.unregister(agent_id)
     
-    def register_agent(self, agent_id: str) -> None:
-        """Register an agent with the broker"""
-        if agent_id not in self.message_queues:
-            self.message_queues[agent_id] = queue.Queue()
-            self.subscribers[agent_id] = []
+    def subscribe(self, subscriber_id: str, publisher_id: str = WILDCARD, message_type: str = WILDCARD) -> None:
+        """Subscribe an agent to messages from another agent, optionally of one message type only"""
+        with self.routes_lock:
+            self.routes.setdefault((publisher_id, message_type), set()).add(subscriber_id)
+            self.route_cache.clear()
     
-    def subscribe(self, subscriber_id: str, publisher_id: str) -> None:
-        """Subscribe an agent to messages from another agent"""
-        if publisher_id in self.subscribers:
-            if subscriber_id not in self.subscribers[publisher_id]:
-                self.subscribers[publisher_id].append(subscriber_id)
+    def unsubscribe(self, subscriber_id: str, publisher_id: str = WILDCARD, message_type: str = WILDCARD) -> None:
+        """Remove a subscription made with the same publisher & message type"""
+        with self.routes_lock:
+            subscribers = self.routes.get((publisher_id, message_type))
+            if subscribers is not None:
+                subscribers.discard(subscriber_id)
+                if not subscribers:
+                    del self.routes[(publisher_id, message_type)]
+            self.route_cache.clear()
+    
+    def _route(self, sender: str, message_type: str) -> FrozenSet[str]:
+        """Subscribers for a (sender, message_type) pair, wildcards included (memoized)"""
+        key = (sender, message_type)
+        subscribers = self.route_cache.get(key)
+        if subscribers is None:
+            with self.routes_lock:
+                matched = set()
+                for route in ((sender, message_type), (sender, WILDCARD), (WILDCARD, message_type), (WILDCARD, WILDCARD)):
+                    matched |= self.routes.get(route, set())
+                
+                # Never echo an agent's own messages back to it
+                matched.discard(sender)
+                subscribers = frozenset(matched)
+                self.route_cache[key] = subscribers
+        return subscribers
+    
+    def _targets(self, message: clsMCPMessage) -> List[str]:
+        """Agents a message gets delivered to - the receiver first, then its subscribers"""
+        targets = [message.receiver] if self.backend.has_agent(message.receiver) else []
+        for subscriber in self._route(message.sender, message.message_type):
+            if subscriber != message.receiver and self.backend.has_agent(subscriber):  # Avoid duplicates
+                targets.append(subscriber)
+        return targets
     
     def publish(self, message: clsMCPMessage) -> None:
         """Publish a message to its intended receiver"""
         # Store in conversation history
-        if message.conversation_id not in self.conversation_history:
-            self.conversation_history[message.conversation_id] = []
-        self.conversation_history[message.conversation_id].append(message)
+        self._record_history(message)
         
-        # Deliver to direct receiver
-        if message.receiver in self.message_queues:
-            self.message_queues[message.receiver].put(message)
+        # Replies to a pending request go straight to its future, not to queues or subscribers
+        if message.reply_to and self._resolve_pending(message):
+            self._log_publish(message, [])
+            return
         
-        # Deliver to subscribers of the sender
-        for subscriber in self.subscribers.get(message.sender, []):
-            if subscriber != message.receiver:  # Avoid duplicates
-                self.message_queues[subscriber].put(message)
+        targets = self._targets(message)
+        self._log_publish(message, targets)
+        
+        for target in targets:
+            try:
+                self.backend.put(target, message)
+            except queue.Full:
+                # Never delivered, so recovery mustn't deliver it either
+                self._log_ack(target, message)
+                
+                # A full receiver queue goes back to the publisher; subscriber copies are best effort
+                if target == message.receiver:
+                    raise
+                print(f"Warning: queue for {target} is full, skipped message {message.id}")
+    
+    def _log_publish(self, message: clsMCPMessage, targets: List[str]) -> None:
+        if self.wal is not None:
+            # Durable backends redeliver on their own - the log only needs the history
+            self.wal.append_publish(message, [] if self.backend.durable else targets)
+    
+    def _log_ack(self, agent_id: str, message: clsMCPMessage) -> None:
+        if self.wal is not None and not self.backend.durable:
+            self.wal.append_ack(agent_id, message.id)
     
     def get_message(self, agent_id: str, timeout: Optional[float] = None) -> Optional[clsMCPMessage]:
         """Get a message for the specified agent"""
+        message = self.backend.get(agent_id, timeout=timeout)
+        if message is not None:
+            # Polling callers take ownership of the message as soon as it's returned
+            self.backend.ack(agent_id, message)
+            self._log_ack(agent_id, message)
+        return message
+    
+    def register_handler(self, agent_id: str, handler: Callable[[clsMCPMessage], Any], concurrency: Optional[int] = None,
+                         reply_only: bool = False) -> None:
+        """Deliver an agent's messages to a handler callback instead of polling get_message.
+        
+        concurrency caps the agent's in-flight handlers (BROKER_AGENT_CONCURRENCY by default).
+        """
+        self.register_agent(agent_id, reply_only)
+        self.handlers[agent_id] = handler
+        
+        if agent_id not in self.pumps:
+            pump = threading.Thread(
+                target=self._pump,
+                args=(agent_id, concurrency or self.agent_concurrency),
+                name=f"mcp-pump-{agent_id}",
+                daemon=True
+            )
+            self.pumps[agent_id] = pump
+            pump.start()
+    
+    def _pump(self, agent_id: str, concurrency: int) -> None:
+        """Block on the agent's queue & hand each message to the dispatcher pool"""
+        # Caps the agent's in-flight handlers so its queue stays the backpressure point
+        slots = threading.BoundedSemaphore(concurrency)
+        while agent_id in self.handlers:
+            slots.acquire()
+            try:
+                message = self.backend.get(agent_id)
+            except Exception as e:
+                if agent_id not in self.handlers:
+                    # Unregistered while waiting - its queue is gone
+                    return
+                # A transient backend failure (e.g. Redis connection) mustn't end the agent's deliveries
+                slots.release()
+                print(f"Warning: couldn't fetch messages for {agent_id}, retrying: {str(e)}")
+                time.sleep(self.pump_retry_seconds)
+                continue
+            
+            if message is None:
+                slots.release()
+                continue
+            
+            future = self.dispatcher.submit(self._dispatch, agent_id, message)
+            future.add_done_callback(lambda _: slots.release())
+    
+    def _dispatch(self, agent_id: str, message: clsMCPMessage) -> None:
+        """Run an agent's handler, keeping its failures away from the dispatcher"""
+        try:
+            deadline = (message.metadata or {}).get("deadline")
+            if deadline is not None and time.time() > deadline:
+                # Nobody waits for the reply any more - don't spend the work on it
+                print(f"Warning: request {message.id} for {agent_id} expired in the queue, skipped")
+            
+            # Replies from other processes complete their pending request instead of reaching the handler
+            elif not (message.reply_to and self._resolve_pending(message)):
+                self.handlers[agent_id](message)
+        except Exception as e:
+            print(f"Error: handler for {agent_id} failed on message {message.id}: {str(e)}")
+            
+            # A request whose handler failed won't get a reply - fail its future now
+            self._fail_pending(message.id, e)
+        
+        # Acked once handled, so a crashed worker's messages get redelivered
+        self.backend.ack(agent_id, message)
+        self._log_ack(agent_id, message)
+    
+    def request(self, message: clsMCPMessage, timeout: Optional[float] = None) -> Future:
+        """Publish a request & return a future resolved by the message whose reply_to matches it"""
+        future: Future = Future()
+        timeout = timeout if timeout is not None else self.request_timeout
+        deadline = time.monotonic() + timeout
+        
+        # Wall clock, so a handler in any process can skip a request its requester gave up on
+        message.metadata["deadline"] = time.time() + timeout
+        
+        with self.pending_lock:
+            self.pending[message.id] = future
+            heapq.heappush(self.pending_deadlines, (deadline, message.id))
+            self.pending_lock.notify()
+            
+            if self.timeout_sweeper is None:
+                self.timeout_sweeper = threading.Thread(target=self._sweep_timeouts, name="mcp-request-timeouts", daemon=True)
+                self.timeout_sweeper.start()
+        
+        # Replies published by other processes arrive through the requester's own queue
+        if message.sender not in self.handlers:
+            self.register_handler(message.sender, self._resolve_pending, reply_only=True)
+        
         try:
-            return self.message_queues[agent_id].get(timeout=timeout)
-        except (queue.Empty, KeyError):
-            return None
+            self.publish(message)
+        except Exception:
+            # Nothing will answer a request that couldn't be delivered
+            with self.pending_lock:
+                self.pending.pop(message.id, None)
+            raise
+        
+        return future
+    
+    async def request_async(self, message: clsMCPMessage, timeout: Optional[float] = None) -> clsMCPMessage:
+        """Awaitable form of request()"""
+        return await asyncio.wrap_future(self.request(message, timeout))
+    
+    def _resolve_pending(self, message: clsMCPMessage) -> bool:
+        """Complete the future waiting for this reply, if there is one"""
+        with self.pending_lock:
+            future = self.pending.pop(message.reply_to, None) if message.reply_to else None
+        
+        if future is None:
+            return False
+        
+        if not future.done():
+            future.set_result(message)
+        return True
+    
+    def _fail_pending(self, message_id: str, error: Exception) -> None:
+        with self.pending_lock:
+            future = self.pending.pop(message_id, None)
+        
+        if future is not None and not future.done():
+            future.set_exception(error)
+    
+    def get_pending_count(self) -> int:
+        """Number of requests still waiting for a reply"""
+        with self.pending_lock:
+            return len(self.pending)
+    
+    def _sweep_timeouts(self) -> None:
+        """Fail requests whose deadline passed without a reply"""
+        while True:
+            with self.pending_lock:
+                while not self.pending_deadlines:
+                    self.pending_lock.wait()
+                
+                deadline, message_id = self.pending_deadlines[0]
+                wait = deadline - time.monotonic()
+                if wait > 0:
+                    self.pending_lock.wait(wait)
+                    continue
+                
+                heapq.heappop(self.pending_deadlines)
+                future = self.pending.pop(message_id, None)
+            
+            # Already answered requests were removed from pending & are skipped here
+            if future is not None and not future.done():
+                future.set_exception(TimeoutError(f"No reply to request {message_id} before the timeout"))
+    
+    def _record_history(self, message: clsMCPMessage, now: Optional[float] = None) -> None:
+        """Append to a conversation's history, applying the retention limits"""
+        now = now if now is not None else time.time()
+        
+        with self.history_lock:
+            history = self.conversation_history.get(message.conversation_id)
+            if history is None:
+                history = deque(maxlen=self.history_max_messages)
+                self.conversation_history[message.conversation_id] = history
+            
+            # The bounded deque drops the conversation's oldest message when full
+            if len(history) == self.history_max_messages:
+                self.history_stats["trimmed_messages"] += 1
+            history.append(message)
+            
+            self.conversation_history.move_to_end(message.conversation_id)
+            self.conversation_touched[message.conversation_id] = now
+            
+            # Expire idle conversations - they sit at the front of the ordered dict
+            while self.conversation_history:
+                oldest = next(iter(self.conversation_history))
+                if now - self.conversation_touched[oldest] <= self.history_ttl:
+                    break
+                self._drop_conversation(oldest)
+                self.history_stats["expired_conversations"] += 1
+            
+            # Evict the least recently active conversations over the cap
+            while len(self.conversation_history) > self.history_max_conversations:
+                self._drop_conversation(next(iter(self.conversation_history)))
+                self.history_stats["evicted_conversations"] += 1
+    
+    def _drop_conversation(self, conversation_id: str) -> None:
+        """Remove a conversation's history (history lock held)"""
+        self.conversation_history.pop(conversation_id, None)
+        self.conversation_touched.pop(conversation_id, None)
+    
+    def close_conversation(self, conversation_id: str) -> bool:
+        """Explicitly release a finished conversation's history"""
+        with self.history_lock:
+            if conversation_id not in self.conversation_history:
+                return False
+            self._drop_conversation(conversation_id)
+            self.history_stats["closed_conversations"] += 1
+        
+        if self.wal is not None:
+            self.wal.append_close(conversation_id)
+        return True
+    
+    def _wal_snapshot(self) -> List[Tuple[clsMCPMessage, List[str], bool]]:
+        """Retained history plus undelivered messages, for compacting the log (log lock held)"""
+        with self.history_lock:
+            messages = [message for history in self.conversation_history.values() for message in history]
+        
+        records = []
+        seen = set()
+        for message in messages:
+            entry = self.wal.inflight.get(message.id)
+            records.append((message, sorted(entry[1]) if entry else [], True))
+            seen.add(message.id)
+        
+        # Still queued, but the conversation's history was already trimmed or closed
+        for message_id, (message, targets) in self.wal.inflight.items():
+            if message_id not in seen:
+                records.append((message, sorted(targets), False))
+        
+        return records
+    
+    def recover(self) -> Dict[str, Any]:
+        """Replay the write-ahead log: rebuild history & re-enqueue messages never acked.
+        
+        Call once at startup, after agents registered & subscriptions are set. Calling it after the
+        agents' run() lets them drain re-enqueued messages, so bounded queues don't fill up.
+        Messages are only logged from here on.
+        """
+        if cf.conf['WAL_ENABLED'] != 'Y':
+            return {"enabled": False}
+        
+        if self.wal is not None:
+            return {"enabled": True, "recovered": False}
+        
+        self.wal = clsMCPWriteAheadLog(self.wal_name)
+        self.wal.snapshot = self._wal_snapshot
+        
+        started = time.perf_counter()
+        inflight: "OrderedDict[str, Tuple[clsMCPMessage, Set[str]]]" = OrderedDict()
+        records = 0
+        
+        for record_type, record in self.wal.replay():
+            records += 1
+            
+            if record_type == RECORD_PUBLISH:
+                message, targets, in_history = record
+                # Original timestamps, so conversations idle past the TTL expire during replay
+                if in_history:
+                    self._record_history(message, now=message.timestamp)
+                if targets:
+                    inflight[message.id] = (message, set(targets))
+            
+            elif record_type == RECORD_ACK:
+                agent_id, message_id = record
+                entry = inflight.get(message_id)
+                if entry is not None:
+                    entry[1].discard(agent_id)
+                    if not entry[1]:
+                        del inflight[message_id]
+            
+            elif record_type == RECORD_CLOSE:
+                with self.history_lock:
+                    self._drop_conversation(record)
+        
+        # Track them before they're re-enqueued - running handlers may ack them straight away
+        with self.wal.lock:
+            self.wal.inflight.update(inflight)
+            pending = [(message, list(targets)) for message, targets in inflight.values()]
+        
+        requeued = 0
+        for message, targets in pending:
+            for agent_id in targets:
+                if not self.backend.has_agent(agent_id):
+                    continue
+                try:
+                    self.backend.put(agent_id, message)
+                    requeued += 1
+                except queue.Full:
+                    print(f"Warning: queue for {agent_id} is full, message {message.id} not recovered")
+                    # Removes the target from the tracked entry too
+                    self.wal.append_ack(agent_id, message.id)
+        
+        # Restarts leave a segment each - fold them into one before they slow the next replay
+        if len(self.wal.recovered_segments) >= self.wal.compact_segments:
+            self.wal.compact()
+        
+        stats = {
+            "enabled": True,
+            "segments": len(self.wal.recovered_segments),
+            "records": records,
+            "conversations": len(self.conversation_history),
+            "requeued": requeued,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+        print(f"Debug - WAL recovery: {stats}")
+        return stats
+    
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Size of the retained history, with an estimate of the bytes it holds"""
+        with self.history_lock:
+            histories = [list(history) for history in self.conversation_history.values()]
+            stats = dict(self.history_stats)
+        
+        stats["conversations"] = len(histories)
+        stats["messages"] = sum(len(history) for history in histories)
+        stats["estimated_bytes"] = sum(len(message.model_dump_json()) for history in histories for message in history)
+        return stats
+    
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """Per-agent queue depth, drop/reject counters & wait times"""
+        return self.backend.get_metrics()
     
     def get_conversation_history(self, conversation_id: str) -> List[clsMCPMessage]:
         """Get the history of a conversation"""
-        return self.conversation_history.get(conversation_id, [])
+        with self.history_lock:
+            return list(self.conversation_history.get(conversation_id, []))
+
+# ----------------------------------------------------------------------------------
+# Benchmark: fan-out throughput of the routing index
+# ----------------------------------------------------------------------------------
+
+def _fanout_benchmark(label, typed, agents=20, count=50000):
+    """Publish to many subscribers & count the deliveries each subscriber actually has to dequeue"""
+    broker = clsMCPBroker(backend=clsInMemoryBrokerBackend())
+    message_types = [f"type_{idx}" for idx in range(agents)]
+    
+    broker.register_agent("publisher")
+    for idx in range(agents):
+        broker.register_agent(f"agent_{idx}")
+        # Typed: each agent only takes the one message type it handles
+        broker.subscribe(f"agent_{idx}", "publisher", message_types[idx] if typed else WILDCARD)
+    
+    messages = [
+        clsMCPMessage.trusted(sender="publisher", receiver="nobody", message_type=message_types[idx % agents],
+                              content={}, conversation_id=f"c{idx % 100}")
+        for idx in range(count)
+    ]
+    
+    started = time.perf_counter()
+    for message in messages:
+        broker.publish(message)
+    elapsed = time.perf_counter() - started
+    
+    deliveries = sum(broker.backend.message_queues[f"agent_{idx}"].qsize() for idx in range(agents))
+    print(f"{label:<28} {count / elapsed:>10,.0f} msg/s  {deliveries:>9,} deliveries  {deliveries / count:>5.1f} per message")
 
+if __name__ == "__main__":
+    from clsBrokerBackend import clsInMemoryBrokerBackend
+    
+    # Nothing consumes during the benchmark, so queues must hold every delivery
+    cf.conf['AGENT_QUEUE_MAXSIZE'] = 50000
+    
+    _fanout_benchmark("subscribe to all types", typed=False)
+    _fanout_benchmark("subscribe by message type", typed=True)
@@ -0,0 +1,96 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import msgpack
+
+from clsMCPMessage import clsMCPMessage
+
+# ----------------------------------------------------------------------------------
+# MCP Wire Codec
+# ----------------------------------------------------------------------------------
+
+# Wire format: one schema version byte followed by a msgpack array of the fields below.
+# Bump the version whenever the field list changes so old payloads are rejected, not misread.
+SCHEMA_VERSION = 1
+FIELDS = ("id", "timestamp", "sender", "receiver", "message_type", "content", "reply_to", "conversation_id", "metadata")
+
+class clsMCPCodec:
+    """Compact binary encoding of MCP messages for cross-process transports"""
+
+    @staticmethod
+    def encode(message: clsMCPMessage) -> bytes:
+        payload = msgpack.packb(
+            [
+                message.id,
+                message.timestamp,
+                message.sender,
+                message.receiver,
+                message.message_type,
+                message.content,
+                message.reply_to,
+                message.conversation_id,
+                message.metadata
+            ],
+            use_bin_type=True
+        )
+        return bytes((SCHEMA_VERSION,)) + payload
+
+    @staticmethod
+    def decode(data: bytes) -> clsMCPMessage:
+        if not data or data[0] != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported MCP wire schema version: {data[0] if data else None}")
+
+        values = msgpack.unpackb(memoryview(data)[1:], raw=False)
+        if len(values) != len(FIELDS):
+            raise ValueError(f"Malformed MCP payload: expected {len(FIELDS)} fields, got {len(values)}")
+
+        # Payloads were validated when first built, so skip validation on the way back in
+        return clsMCPMessage.from_fields(dict(zip(FIELDS, values)))
+
+# ----------------------------------------------------------------------------------
+# Microbenchmark: construction, encoding & decoding throughput
+# ----------------------------------------------------------------------------------
+
+def _rate(label, func, count):
+    import time
+
+    started = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {count / elapsed:>12,.0f} msg/s")
+
+if __name__ == "__main__":
+    COUNT = 100000
+
+    content = {
+        "original_text": "यह एक उदाहरण वाक्य है " * 4,
+        "language": {"language": "HINDI", "is_indian": True, "language_code": "hi-IN", "is_mixed": False, "languages": []},
+        "translation": {"translated_text": "This is an example sentence " * 4, "provider": "sarvam"},
+        "final_text": "This is an example sentence " * 4,
+        "conversation_id": "c0ffee"
+    }
+    fields = dict(sender="translation_agent", receiver="doc_agent", message_type="translation_response",
+                  content=content, reply_to="r1", conversation_id="c0ffee")
+
+    message = clsMCPMessage(**fields)
+    json_payload = message.model_dump_json()
+    wire_payload = clsMCPCodec.encode(message)
+
+    print(f"Payload size: json {len(json_payload)} bytes, msgpack {len(wire_payload)} bytes")
+    _rate("construct (pydantic validation)", lambda: clsMCPMessage(**fields), COUNT)
+    _rate("construct (trusted)", lambda: clsMCPMessage.trusted(**fields), COUNT)
+    _rate("encode (model_dump_json)", message.model_dump_json, COUNT)
+    _rate("encode (msgpack codec)", lambda: clsMCPCodec.encode(message), COUNT)
+    _rate("decode (model_validate_json)", lambda: clsMCPMessage.model_validate_json(json_payload), COUNT)
+    _rate("decode (msgpack codec)", lambda: clsMCPCodec.decode(wire_payload), COUNT)
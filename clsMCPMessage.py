@@ -11,6 +11,7 @@
 ####                                        ####
 ################################################
 
+import itertools
 import time
 import uuid
 from typing import Dict, Optional, Any
@@ -20,6 +21,10 @@ from pydantic import BaseModel, Field
 # Message-Chaining Protocol (MCP) Implementation
 # ----------------------------------------------------------------------------------
 
+# Cheap unique ids for trusted messages: a per-process prefix plus a counter
+_id_prefix = uuid.uuid4().hex[:12]
+_id_counter = itertools.count()
+
 class clsMCPMessage(BaseModel):
     """Message format for MCP protocol"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -31,4 +36,34 @@ class clsMCPMessage(BaseModel):
     reply_to: Optional[str] = None
     conversation_id: str
     metadata: Dict[str, Any] = {}
+    
+    @classmethod
+    def from_fields(cls, fields: Dict[str, Any]) -> "clsMCPMessage":
+        """Wrap a complete, already valid field dict as a message - same result as model_construct, minus its per-field default handling"""
+        message = cls.__new__(cls)
+        object.__setattr__(message, "__dict__", fields)
+        object.__setattr__(message, "__pydantic_fields_set__", set(_ALL_FIELDS))
+        object.__setattr__(message, "__pydantic_extra__", None)
+        object.__setattr__(message, "__pydantic_private__", None)
+        return message
+    
+    @classmethod
+    def trusted(cls, sender: str, receiver: str, message_type: str, content: Dict[str, Any],
+                conversation_id: str, reply_to: Optional[str] = None,
+                metadata: Optional[Dict[str, Any]] = None) -> "clsMCPMessage":
+        """Build a message from internal, already valid fields without running pydantic validation"""
+        return cls.from_fields({
+            "id": f"{_id_prefix}-{next(_id_counter)}",
+            "timestamp": time.time(),
+            "sender": sender,
+            "receiver": receiver,
+            "message_type": message_type,
+            "content": content,
+            "reply_to": reply_to,
+            "conversation_id": conversation_id,
+            "metadata": metadata if metadata is not None else {}
+        })
+
+# Every field is always set on fast-path messages
+_ALL_FIELDS = frozenset(clsMCPMessage.model_fields)
 
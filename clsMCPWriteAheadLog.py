@@ -0,0 +1,273 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import msgpack
+
+from clsMCPMessage import clsMCPMessage
+from clsMCPCodec import clsMCPCodec
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# MCP Write-Ahead Log
+# ----------------------------------------------------------------------------------
+
+# Record layout: length (4 bytes) | crc32 (4 bytes) | type (1 byte) | payload.
+# Length & crc cover the type byte plus the payload.
+HEADER = struct.Struct("<II")
+
+RECORD_PUBLISH = b"P"   # msgpack [encoded message, agents still to deliver to, kept in history]
+RECORD_ACK = b"A"       # msgpack [agent id, message id]
+RECORD_CLOSE = b"C"     # conversation id
+
+SEGMENT_NAME = re.compile(r"^wal-(\d{10})\.log$")
+
+class clsMCPWriteAheadLog:
+    """Append-only, length-prefixed log of broker activity with batched fsync, rotation & compaction"""
+
+    def __init__(self, name: str = "broker", directory: Optional[str] = None):
+        # One log directory per broker process - segments are never shared between writers
+        self.directory = directory or os.path.join(cf.conf['DATA_PATH'], 'mcp_wal', name)
+        self.segment_bytes = cf.conf['WAL_SEGMENT_BYTES']
+        self.fsync_interval = cf.conf['WAL_FSYNC_INTERVAL_MS'] / 1000
+        self.fsync_batch = cf.conf['WAL_FSYNC_BATCH']
+        self.compact_segments = cf.conf['WAL_COMPACT_SEGMENTS']
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Segments already on disk are replayed; new records go to a fresh segment
+        self.recovered_segments = self._list_segments()
+        self.active_seq = (self.recovered_segments[-1][0] if self.recovered_segments else 0) + 1
+        self.active = open(self._segment_path(self.active_seq), "ab")
+        self.active_size = 0
+
+        # Messages whose delivery isn't acked by every target yet: id -> (message, targets)
+        self.inflight: Dict[str, Tuple[clsMCPMessage, Set[str]]] = {}
+
+        # Called with the log lock held during compaction; returns (message, pending targets) to keep
+        self.snapshot: Optional[Callable[[], List[Tuple[clsMCPMessage, List[str], bool]]]] = None
+
+        self.lock = threading.Condition()
+        self.unsynced = 0
+        self.compact_due = False
+        self.stats = {"records": 0, "fsyncs": 0, "rotations": 0, "compactions": 0}
+
+        self.flusher = threading.Thread(target=self._flush_loop, name="mcp-wal-flusher", daemon=True)
+        self.flusher.start()
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"wal-{seq:010d}.log")
+
+    def _list_segments(self) -> List[Tuple[int, str]]:
+        segments = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_NAME.match(name)
+            if match:
+                segments.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _frame(self, record_type: bytes, payload: bytes) -> bytes:
+        body = record_type + payload
+        return HEADER.pack(len(body), zlib.crc32(body)) + body
+
+    def _append(self, record_type: bytes, payload: bytes) -> None:
+        frame = self._frame(record_type, payload)
+
+        with self.lock:
+            self.active.write(frame)
+            self.active_size += len(frame)
+            self.unsynced += 1
+            self.stats["records"] += 1
+
+            if self.active_size >= self.segment_bytes:
+                self._rotate()
+
+            # Group commit - the flusher fsyncs once per batch or interval
+            if self.unsynced >= self.fsync_batch or self.compact_due:
+                self.lock.notify()
+
+    def append_publish(self, message: clsMCPMessage, targets: List[str]) -> None:
+        if targets:
+            with self.lock:
+                self.inflight[message.id] = (message, set(targets))
+        self._append(RECORD_PUBLISH, msgpack.packb([clsMCPCodec.encode(message), targets, True], use_bin_type=True))
+
+    def append_ack(self, agent_id: str, message_id: str) -> None:
+        with self.lock:
+            entry = self.inflight.get(message_id)
+            if entry is not None:
+                entry[1].discard(agent_id)
+                if not entry[1]:
+                    del self.inflight[message_id]
+        self._append(RECORD_ACK, msgpack.packb([agent_id, message_id], use_bin_type=True))
+
+    def append_close(self, conversation_id: str) -> None:
+        self._append(RECORD_CLOSE, conversation_id.encode("utf-8"))
+
+    def _sync(self) -> None:
+        """Flush & fsync the active segment (lock held)"""
+        if self.unsynced:
+            self.active.flush()
+            os.fsync(self.active.fileno())
+            self.unsynced = 0
+            self.stats["fsyncs"] += 1
+
+    def _rotate(self) -> None:
+        """Seal the active segment & start the next one (lock held)"""
+        self._sync()
+        self.active.close()
+
+        self.active_seq += 1
+        self.active = open(self._segment_path(self.active_seq), "ab")
+        self.active_size = 0
+        self.stats["rotations"] += 1
+
+        if len(self._list_segments()) > self.compact_segments:
+            self.compact_due = True
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self.lock:
+                self.lock.wait(self.fsync_interval)
+                self._sync()
+                compact = self.compact_due and self.snapshot is not None
+
+            if compact:
+                self.compact()
+
+    def compact(self) -> None:
+        """Replace every segment with one holding only retained history & undelivered messages"""
+        with self.lock:
+            self.compact_due = False
+            self._sync()
+            self.active.close()
+
+            snapshot_seq = self.active_seq + 1
+            snapshot_path = self._segment_path(snapshot_seq)
+            temp_path = snapshot_path + ".tmp"
+
+            with open(temp_path, "wb") as snapshot_file:
+                for message, targets, in_history in self.snapshot():
+                    snapshot_file.write(self._frame(
+                        RECORD_PUBLISH,
+                        msgpack.packb([clsMCPCodec.encode(message), targets, in_history], use_bin_type=True)
+                    ))
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+
+            os.replace(temp_path, snapshot_path)
+
+            for seq, path in self._list_segments():
+                if seq < snapshot_seq:
+                    os.remove(path)
+
+            self.active_seq = snapshot_seq + 1
+            self.active = open(self._segment_path(self.active_seq), "ab")
+            self.active_size = 0
+            self.stats["compactions"] += 1
+
+    def close(self) -> None:
+        with self.lock:
+            self._sync()
+            self.active.close()
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+
+    def _read_segment(self, path: str) -> Iterator[Tuple[bytes, bytes]]:
+        """Yield (type, payload) records from a segment via a memory map, stopping at a torn tail"""
+        if os.path.getsize(path) == 0:
+            return
+
+        with open(path, "rb") as segment_file:
+            with mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    offset = 0
+                    end = len(view)
+                    while offset + HEADER.size <= end:
+                        length, crc = HEADER.unpack_from(view, offset)
+                        start = offset + HEADER.size
+                        # Copied out, so no view into the map outlives it
+                        body = bytes(view[start:start + length])
+                        if length == 0 or len(body) < length or zlib.crc32(body) != crc:
+                            print(f"Warning: WAL segment {path} is truncated or corrupt at offset {offset}, ignoring the rest")
+                            break
+                        yield body[:1], body[1:]
+                        offset = start + length
+                finally:
+                    view.release()
+
+    def replay(self) -> Iterator[Tuple[bytes, object]]:
+        """Decode every record of the segments found at startup, in order"""
+        for _, path in self.recovered_segments:
+            for record_type, payload in self._read_segment(path):
+                if record_type == RECORD_PUBLISH:
+                    encoded, targets, in_history = msgpack.unpackb(payload, raw=False)
+                    yield record_type, (clsMCPCodec.decode(encoded), targets, in_history)
+                elif record_type == RECORD_ACK:
+                    yield record_type, tuple(msgpack.unpackb(payload, raw=False))
+                elif record_type == RECORD_CLOSE:
+                    yield record_type, payload.decode("utf-8")
+
+# ----------------------------------------------------------------------------------
+# Benchmark: append throughput with group commit vs fsync per record, and replay speed
+# ----------------------------------------------------------------------------------
+
+def _append_benchmark(label, fsync_batch, count):
+    import tempfile
+    import time
+
+    cf.conf['WAL_FSYNC_BATCH'] = fsync_batch
+    directory = tempfile.mkdtemp(prefix="mcp_wal_")
+    wal = clsMCPWriteAheadLog(directory=directory)
+
+    messages = [
+        clsMCPMessage.trusted(sender="doc_agent", receiver="translation_agent", message_type="translation_request",
+                              content={"text": f"segment {idx} " * 20}, conversation_id=f"c{idx % 100}")
+        for idx in range(count)
+    ]
+
+    started = time.perf_counter()
+    for message in messages:
+        wal.append_publish(message, [message.receiver])
+        if fsync_batch == 1:
+            # Synchronous durability - wait for this record's own fsync
+            with wal.lock:
+                wal._sync()
+    wal.close()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<26} {count / elapsed:>10,.0f} records/s  {wal.stats['fsyncs']:>7,} fsyncs")
+
+    replayer = clsMCPWriteAheadLog(directory=directory)
+    started = time.perf_counter()
+    replayed = sum(1 for _ in replayer.replay())
+    elapsed = time.perf_counter() - started
+    print(f"{'  replay':<26} {replayed / elapsed:>10,.0f} records/s  {replayed:>7,} records")
+    replayer.close()
+
+if __name__ == "__main__":
+    _append_benchmark("fsync per record", fsync_batch=1, count=5000)
+    _append_benchmark("group commit (256)", fsync_batch=256, count=200000)
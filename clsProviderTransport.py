@@ -0,0 +1,145 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# Provider HTTP Transport
+# ----------------------------------------------------------------------------------
+
+# Status codes worth retrying - rate limits & transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class clsCircuitOpenError(Exception):
+    """Raised when a provider call is refused because its circuit is open"""
+    pass
+
+class clsCircuitBreaker:
+    """Fail fast when a provider keeps failing, probing it again after a cool down"""
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold if failure_threshold is not None else cf.conf['CIRCUIT_FAILURE_THRESHOLD']
+        self.reset_timeout = reset_timeout if reset_timeout is not None else cf.conf['CIRCUIT_RESET_TIMEOUT']
+
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open"""
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Check whether a call may go through"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+
+            # After the cool down let exactly one probe call through
+            if time.monotonic() - self.opened_at >= self.reset_timeout and not self.probing:
+                self.probing = True
+                return True
+
+            return False
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+class clsProviderTransport:
+    """Keep-alive HTTP transport for one provider with timeouts, retries & a circuit breaker"""
+
+    def __init__(self, provider: str, pool_size=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff_base=None, backoff_max=None):
+        self.provider = provider
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else cf.conf['HTTP_CONNECT_TIMEOUT'],
+            read_timeout if read_timeout is not None else cf.conf['HTTP_READ_TIMEOUT']
+        )
+        self.max_retries = max_retries if max_retries is not None else cf.conf['HTTP_MAX_RETRIES']
+        self.backoff_base = backoff_base if backoff_base is not None else cf.conf['HTTP_BACKOFF_BASE']
+        self.backoff_max = backoff_max if backoff_max is not None else cf.conf['HTTP_BACKOFF_MAX']
+
+        # One persistent connection pool per provider
+        pool_size = pool_size if pool_size is not None else cf.conf['HTTP_POOL_SIZE']
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.breaker = clsCircuitBreaker()
+
+    def _backoff(self, attempt: int, response=None) -> float:
+        """Delay before the next attempt - full jitter exponential backoff, honouring Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST to the provider, retrying rate limits, server errors & connection failures"""
+        if not self.breaker.allow():
+            raise clsCircuitOpenError(f"{self.provider} circuit is open, skipping call")
+
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            except Exception:
+                # Anything else (a dropped body, bad encoding...) still ends the call - and a half-open probe
+                self.breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES:
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    return response
+                time.sleep(self._backoff(attempt, response))
+                continue
+
+            # Any other answer means the provider is up
+            self.breaker.record_success()
+            return response
@@ -0,0 +1,195 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import os
+import socket
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+import redis
+
+from clsMCPMessage import clsMCPMessage
+from clsMCPCodec import clsMCPCodec
+from clsBrokerBackend import clsBrokerBackend
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# Redis Streams Broker Backend
+# ----------------------------------------------------------------------------------
+
+class clsRedisBrokerBackend(clsBrokerBackend):
+    """Redis Streams transport - one stream & consumer group per agent, shared across processes"""
+
+    durable = True
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self.client = client or redis.Redis.from_url(cf.conf['REDIS_URL'])
+        self.prefix = cf.conf['REDIS_STREAM_PREFIX']
+        self.maxlen = cf.conf['REDIS_STREAM_MAXLEN']
+        self.redeliver_idle_ms = cf.conf['REDIS_REDELIVER_IDLE_MS']
+        self.block_ms = cf.conf['REDIS_BLOCK_MS']
+
+        # Consumer name is unique per process so pending entries can be claimed by others
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+
+        self.known_agents: Set[str] = set()
+
+        # Reply-only streams of this process - kept out of the shared agent set & expiring
+        # unless refreshed, so a stopped process doesn't leave a stream collecting late replies
+        self.reply_streams: Dict[str, float] = {}
+        self.reply_ttl = cf.conf['REDIS_REPLY_STREAM_TTL_SECONDS']
+        self.entry_ids: Dict[Tuple[str, str], bytes] = {}
+        self.lock = threading.Lock()
+
+        # Entries read but not acked yet are re-claimed in the background, so their idle time
+        # stays under REDIS_REDELIVER_IDLE_MS while a long handler runs & peers don't take them
+        self.refresher: Optional[threading.Thread] = None
+
+    def _stream(self, agent_id: str) -> str:
+        return f"{self.prefix}:{agent_id}"
+
+    def _reply_key(self, agent_id: str) -> str:
+        return f"{self.prefix}:reply:{agent_id}"
+
+    def register(self, agent_id: str, reply_only: bool = False) -> None:
+        try:
+            self.client.xgroup_create(self._stream(agent_id), agent_id, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            # The group already exists when another process registered the agent first
+            if "BUSYGROUP" not in str(e):
+                raise
+
+        if reply_only:
+            self.reply_streams[agent_id] = 0
+            self._touch_reply(agent_id)
+            return
+
+        self.client.sadd(f"{self.prefix}:agents", agent_id)
+        self.known_agents.add(agent_id)
+
+    def _touch_reply(self, agent_id: str) -> None:
+        """Push back the expiry of one of this process's reply streams (every third of the TTL)"""
+        now = time.monotonic()
+        if now - self.reply_streams[agent_id] < self.reply_ttl / 3:
+            return
+
+        pipe = self.client.pipeline()
+        pipe.set(self._reply_key(agent_id), 1, ex=self.reply_ttl)
+        pipe.expire(self._stream(agent_id), self.reply_ttl)
+        pipe.execute()
+        self.reply_streams[agent_id] = now
+
+    def unregister(self, agent_id: str) -> None:
+        self.known_agents.discard(agent_id)
+        self.reply_streams.pop(agent_id, None)
+        self.client.srem(f"{self.prefix}:agents", agent_id)
+        self.client.delete(self._reply_key(agent_id), self._stream(agent_id))
+
+    def has_agent(self, agent_id: str) -> bool:
+        if agent_id in self.known_agents or agent_id in self.reply_streams:
+            return True
+
+        if self.client.sismember(f"{self.prefix}:agents", agent_id):
+            self.known_agents.add(agent_id)
+            return True
+
+        # Another process's reply stream - live only while its owner keeps refreshing it
+        return bool(self.client.exists(self._reply_key(agent_id)))
+
+    def put(self, agent_id: str, message: clsMCPMessage) -> None:
+        self.client.xadd(
+            self._stream(agent_id),
+            {"m": clsMCPCodec.encode(message)},
+            maxlen=self.maxlen,
+            approximate=True,
+            # An expired reply stream isn't brought back (without a TTL) by a late reply
+            nomkstream=agent_id not in self.known_agents
+        )
+
+    def _decode(self, agent_id: str, entry_id: bytes, fields: Dict[bytes, bytes]) -> clsMCPMessage:
+        """Rebuild the message & remember its entry id for the ack"""
+        message = clsMCPCodec.decode(fields[b"m"])
+        with self.lock:
+            self.entry_ids[(agent_id, message.id)] = entry_id
+            if self.refresher is None:
+                self.refresher = threading.Thread(target=self._refresh_loop, name="redis-claim-refresh", daemon=True)
+                self.refresher.start()
+        return message
+
+    def _refresh_loop(self) -> None:
+        while True:
+            time.sleep(self.redeliver_idle_ms / 3000)
+
+            with self.lock:
+                held: Dict[str, list] = {}
+                for (agent_id, _), entry_id in self.entry_ids.items():
+                    held.setdefault(agent_id, []).append(entry_id)
+
+            for agent_id, entry_ids in held.items():
+                try:
+                    # JUSTID resets the idle time without counting another delivery
+                    self.client.xclaim(
+                        self._stream(agent_id), agent_id, self.consumer,
+                        min_idle_time=0, message_ids=entry_ids, justid=True
+                    )
+                except redis.RedisError as e:
+                    print(f"Warning: couldn't refresh pending entries for {agent_id}: {str(e)}")
+
+    def _claim_stale(self, agent_id: str) -> Optional[clsMCPMessage]:
+        """Take over one entry another consumer read but never acked (e.g. it crashed)
+
+        Entries still being handled are refreshed by their consumer, so only ones
+        left idle past REDIS_REDELIVER_IDLE_MS - by a dead consumer - are claimed.
+        """
+        _, entries, _ = self.client.xautoclaim(
+            self._stream(agent_id), agent_id, self.consumer,
+            min_idle_time=self.redeliver_idle_ms, start_id="0-0", count=1
+        )
+        for entry_id, fields in entries:
+            if fields:
+                return self._decode(agent_id, entry_id, fields)
+        return None
+
+    def get(self, agent_id: str, timeout: Optional[float] = None) -> Optional[clsMCPMessage]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            if agent_id in self.reply_streams:
+                self._touch_reply(agent_id)
+
+            message = self._claim_stale(agent_id)
+            if message is not None:
+                return message
+
+            # Block in short slices so stale entries keep being reclaimed
+            block_ms = self.block_ms
+            if deadline is not None:
+                block_ms = max(1, min(block_ms, int((deadline - time.monotonic()) * 1000)))
+
+            response = self.client.xreadgroup(
+                agent_id, self.consumer, {self._stream(agent_id): ">"}, count=1, block=block_ms
+            )
+            for _, entries in response or []:
+                for entry_id, fields in entries:
+                    return self._decode(agent_id, entry_id, fields)
+
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+    def ack(self, agent_id: str, message: clsMCPMessage) -> None:
+        with self.lock:
+            entry_id = self.entry_ids.pop((agent_id, message.id), None)
+
+        if entry_id is not None:
+            self.client.xack(self._stream(agent_id), agent_id, entry_id)
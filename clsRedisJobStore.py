@@ -0,0 +1,73 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script keeps the state ####
+#### of the background video processing     ####
+#### jobs, so the API can report their      ####
+#### status, progress & results.            ####
+####                                        ####
+################################################
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from clsJobStore import clsJobStore, FINISHED_STATES
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# Redis Job Store
+# ----------------------------------------------------------------------------------
+
+class clsRedisJobStore(clsJobStore):
+    """Job records as JSON strings in Redis, so any API process can report any job"""
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self.client = client or redis.Redis.from_url(cf.conf['REDIS_URL'])
+        self.prefix = cf.conf['REDIS_STREAM_PREFIX']
+        self.retention = cf.conf['JOB_RETENTION_SECONDS']
+        self.poll_seconds = cf.conf['JOB_EVENT_POLL_SECONDS']
+
+    def _key(self, task_id: str) -> str:
+        return f"{self.prefix}:job:{task_id}"
+
+    def _events_key(self, task_id: str) -> str:
+        return f"{self.prefix}:job:{task_id}:events"
+
+    def save(self, job: Dict[str, Any]) -> None:
+        # Finished jobs expire after the retention period; running ones are kept
+        expiry = self.retention if job["status"] in FINISHED_STATES else None
+        self.client.set(self._key(job["task_id"]), json.dumps(job, default=str), ex=expiry)
+        if expiry is not None:
+            self.client.expire(self._events_key(job["task_id"]), expiry)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._key(task_id))
+        return json.loads(raw) if raw is not None else None
+
+    def append_event(self, task_id: str, event: str, data: Dict[str, Any]) -> int:
+        # The list index is the event id - RPUSH returns the new length
+        length = self.client.rpush(self._events_key(task_id), json.dumps({"event": event, "data": data}, default=str))
+        if event in FINISHED_STATES:
+            self.client.expire(self._events_key(task_id), self.retention)
+        return length - 1
+
+    def get_events(self, task_id: str, offset: int, timeout: float = 0) -> List[Dict[str, Any]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            raw_events = self.client.lrange(self._events_key(task_id), offset, -1)
+            if raw_events or time.monotonic() >= deadline:
+                break
+            time.sleep(min(self.poll_seconds, max(0, deadline - time.monotonic())))
+
+        events = []
+        for idx, raw in enumerate(raw_events):
+            event = json.loads(raw)
+            event["id"] = offset + idx
+            events.append(event)
+        return events
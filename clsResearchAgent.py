@@ -11,13 +11,18 @@
 ####                                        ####
 ################################################
 
+import queue
+import re
 import time
-from typing import Dict, List, Optional, Any, Union
+import unicodedata
+from typing import Dict, List, Optional, Any, Tuple, Union
 
 # Import AutoGen components
 from autogen import AssistantAgent, UserProxyAgent
 import clsMCPBroker
 from clsMCPMessage import clsMCPMessage
+from clsLLMResponseCache import get_llm_cache
+from clsSingleFlight import clsSingleFlight
 
 from clsConfigClient import clsConfigClient as cf
 
@@ -56,15 +61,44 @@ class clsResearchAgent:
             print("Warning: OPENAI_API_KEY not set for ResearchAgent")
             
         # Create config list directly instead of loading from file
-        config_list = [
+        self.model = "gpt-4-0125-preview"
+        self.temperature = 0.1
+        self.config_list = [
             {
-                "model": "gpt-4-0125-preview",
+                "model": self.model,
                 "api_key": OPENAI_API_KEY
             }
         ]
+        
+        # Pool of isolated assistant/proxy pairs - one research chat per pair at a time
+        self.pool_size = cf.conf['RESEARCH_POOL_SIZE']
+        self.pool: "queue.Queue[Tuple[AssistantAgent, UserProxyAgent]]" = queue.Queue()
+        for idx in range(self.pool_size):
+            self.pool.put(self._create_pair(idx))
+        
+        # Current conversation tracking
+        self.current_requests = {}
+        
+        # The same research prompt is answered from the cache instead of a new chat
+        self.llm_cache = get_llm_cache()
+        
+        # Requests on one topic share a single chat while it runs, and its result for a while after
+        self.research_flights = clsSingleFlight(
+            ttl_seconds=cf.conf['RESEARCH_RESULT_TTL_SECONDS'],
+            max_items=cf.conf['RESEARCH_RESULT_MAX_ITEMS']
+        )
+    
+    def topic_key(self, request_text: str) -> str:
+        """Normalize a research request so mentions of the same topic map to one key"""
+        text = unicodedata.normalize("NFKC", request_text).casefold()
+        text = re.sub(r"[^\w\s]", " ", text)
+        return " ".join(text.split())
+    
+    def _create_pair(self, idx: int) -> Tuple[AssistantAgent, UserProxyAgent]:
+        """Create one AutoGen assistant & the user proxy that drives it"""
         # Create AutoGen assistant for research
-        self.assistant = AssistantAgent(
-            name="research_assistant",
+        assistant = AssistantAgent(
+            name=f"research_assistant_{idx}",
             system_message="""You are a Research Agent for YouTube videos. Your responsibilities include:
                 1. Research topics mentioned in the video
                 2. Find relevant information, facts, references, or context
@@ -73,19 +107,34 @@ class clsResearchAgent:
                 
                 Respond directly to research requests with clear, factual information.
             """,
-            llm_config={"config_list": config_list, "temperature": 0.1}
+            llm_config={"config_list": self.config_list, "temperature": self.temperature}
         )
         
         # Create user proxy to handle message passing
-        self.user_proxy = UserProxyAgent(
-            name="research_manager",
+        user_proxy = UserProxyAgent(
+            name=f"research_manager_{idx}",
             human_input_mode="NEVER",
             code_execution_config={"work_dir": "coding", "use_docker": False},
             default_auto_reply="Working on the research request..."
         )
         
-        # Current conversation tracking
-        self.current_requests = {}
+        return assistant, user_proxy
+    
+    def _research(self, prompt: str) -> str:
+        """Run one research chat on a free pair from the pool"""
+        assistant, user_proxy = self.pool.get()
+        try:
+            user_proxy.initiate_chat(
+                assistant,
+                message=prompt
+            )
+            # Return last assistant message
+            return assistant.chat_messages[user_proxy.name][-1]["content"]
+        finally:
+            # Every request starts from an empty chat, so latency doesn't grow with the process' age
+            assistant.reset()
+            user_proxy.reset()
+            self.pool.put((assistant, user_proxy))
     
     def handle_mcp_message(self, message: clsMCPMessage) -> Optional[clsMCPMessage]:
         """Handle an incoming MCP message"""
@@ -94,19 +143,16 @@ class clsResearchAgent:
             request_text = message.content.get("text", "")
             
             # Use AutoGen to process the research request
-            def research_task():
-                self.user_proxy.initiate_chat(
-                    self.assistant,
-                    message=f"Research request for YouTube video content: {request_text}. Provide concise, factual information."
-                )
-                # Return last assistant message
-                return self.assistant.chat_messages[self.user_proxy.name][-1]["content"]
+            prompt = f"Research request for YouTube video content: {request_text}. Provide concise, factual information."
             
-            # Execute research task
-            research_result = research_task()
+            # Execute research task, unless the topic is being or was recently researched
+            research_result = self.research_flights.do(
+                self.topic_key(request_text),
+                lambda: self.llm_cache.get_or_call(self.model, self.temperature, prompt, lambda: self._research(prompt))
+            )
             
             # Send research results back to Documentation Agent
-            response = clsMCPMessage(
+            response = clsMCPMessage.trusted(
                 sender=self.agent_id,
                 receiver=message.sender,
                 message_type="research_response",
@@ -123,9 +169,8 @@ class clsResearchAgent:
     def run(self):
         """Run the agent to listen for MCP messages"""
         print(f"Research Agent {self.agent_id} is running...")
-        while True:
-            message = self.broker.get_message(self.agent_id, timeout=1)
-            if message:
-                self.handle_mcp_message(message)
-            time.sleep(0.1)
+        
+        # The broker pushes messages to the handler, so an idle agent uses no CPU.
+        # One handler per pooled pair lets research requests run concurrently.
+        self.broker.register_handler(self.agent_id, self.handle_mcp_message, concurrency=self.pool_size)
 
@@ -11,15 +11,20 @@
 ####                                        ####
 ################################################
 
+from contextvars import ContextVar
 from typing import Dict, Optional, Any
 from pydantic import Field
 from langchain.tools import BaseTool
 
 import clsMCPBroker
-import clsMCPMessage
+from clsMCPMessage import clsMCPMessage
 
 from clsConfigClient import clsConfigClient as cf
 
+# Conversation of the agent call running in this thread - set by the calling agent, so messages
+# land in the right conversation whatever id the LLM filled in
+current_conversation_id: ContextVar[Optional[str]] = ContextVar("current_conversation_id", default=None)
+
 # ----------------------------------------------------------------------------------
 # Documentation Agent (using LangChain)
 # ----------------------------------------------------------------------------------
@@ -80,7 +85,7 @@ class clsSendMessageTool(BaseTool):
             message_type=message_type,
             content={"text": content},
             reply_to=reply_to,
-            conversation_id=conversation_id
+            conversation_id=current_conversation_id.get() or conversation_id
         )
         self.broker.publish(message)
         return f"Message sent to {receiver}"
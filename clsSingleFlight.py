@@ -0,0 +1,91 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+# ----------------------------------------------------------------------------------
+# Single-Flight Call Coalescing
+# ----------------------------------------------------------------------------------
+
+class clsSingleFlight:
+    """Runs one call per key at a time - concurrent callers with the same key share its result"""
+
+    def __init__(self, ttl_seconds: float = 0, max_items: int = 1000):
+        # Completed results are kept for ttl_seconds (0 keeps nothing once the call is done)
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+
+        self.inflight: Dict[str, Future] = {}
+        self.results: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "result_hits": 0, "errors": 0}
+
+    def do(self, key: str, call: Callable[[], Any]) -> Any:
+        """Return the result for key - from a recent call, by waiting on the call in flight, or by calling"""
+        with self.lock:
+            entry = self.results.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[1] <= self.ttl_seconds:
+                    self.stats["result_hits"] += 1
+                    return entry[0]
+                del self.results[key]
+
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.inflight[key] = future
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            # Raises the leader's exception too - every waiter sees the same outcome
+            return future.result()
+
+        try:
+            value = call()
+        except Exception as e:
+            # Failures aren't kept, so the next caller tries again
+            with self.lock:
+                self.inflight.pop(key, None)
+                self.stats["errors"] += 1
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self.inflight.pop(key, None)
+            if self.ttl_seconds > 0:
+                self.results[key] = (value, time.monotonic())
+                while len(self.results) > self.max_items:
+                    self.results.popitem(last=False)
+
+        future.set_result(value)
+        return value
+
+    def forget(self, key: str) -> None:
+        """Drop a kept result, so the next call for key runs again"""
+        with self.lock:
+            self.results.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Calls made, callers coalesced onto them & results served from the kept ones"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["inflight"] = len(self.inflight)
+            stats["kept_results"] = len(self.results)
+        return stats
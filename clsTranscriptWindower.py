@@ -0,0 +1,96 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import re
+from typing import Dict, List, Optional, Any
+
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# Transcript Windowing
+# ----------------------------------------------------------------------------------
+
+# Caption lines ending with one of these are treated as sentence boundaries
+SENTENCE_END = re.compile(r'[.!?।॥]["\')\]]*\s*$')
+
+class clsTranscriptWindower:
+    """Merge adjacent caption segments into token and time bounded windows"""
+
+    def __init__(self, max_tokens=None, max_seconds=None, split_sentence=None):
+        self.max_tokens = max_tokens if max_tokens is not None else cf.conf['WINDOW_MAX_TOKENS']
+        self.max_seconds = max_seconds if max_seconds is not None else cf.conf['WINDOW_MAX_SECONDS']
+
+        if split_sentence is None:
+            split_sentence = cf.conf['WINDOW_SPLIT_SENTENCE'] == 'Y'
+        self.split_sentence = split_sentence
+
+    def estimate_tokens(self, text: str) -> int:
+        """Rough token estimate (about 4 characters per token)"""
+        return max(1, len(text) // 4)
+
+    def _exceeds(self, current: List[Dict[str, Any]], segment: Dict[str, Any]) -> bool:
+        """Check whether adding the segment would break the window policy"""
+        tokens = sum(self.estimate_tokens(seg["text"]) for seg in current)
+        tokens += self.estimate_tokens(segment["text"])
+        if tokens > self.max_tokens:
+            return True
+
+        span = segment["start"] + segment.get("duration", 0) - current[0]["start"]
+        return span > self.max_seconds
+
+    def _sentence_cut(self, current: List[Dict[str, Any]]) -> Optional[int]:
+        """Return the position after the last sentence boundary in the window, if any"""
+        for pos in range(len(current) - 1, -1, -1):
+            if SENTENCE_END.search(current[pos]["text"]):
+                return pos + 1
+        return None
+
+    def _build_window(self, current: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Collapse a list of segments into a single window"""
+        last = current[-1]
+        return {
+            "text": " ".join(seg["text"].strip() for seg in current if seg["text"].strip()),
+            "start": current[0]["start"],
+            "end": last["start"] + last.get("duration", 0),
+            "segment_indices": [seg["index"] for seg in current]
+        }
+
+    def build_windows(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group standardized segments (text, start, duration) into windows"""
+        windows = []
+        current = []
+
+        for idx, segment in enumerate(segments):
+            segment = {**segment, "index": idx}
+
+            if current and self._exceeds(current, segment):
+                cut = len(current)
+
+                # Prefer closing the window where a sentence ends
+                if self.split_sentence:
+                    cut = self._sentence_cut(current) or cut
+
+                windows.append(self._build_window(current[:cut]))
+                current = current[cut:]
+
+                # The carried over tail may still not fit with the new segment
+                if current and self._exceeds(current, segment):
+                    windows.append(self._build_window(current))
+                    current = []
+
+            current.append(segment)
+
+        if current:
+            windows.append(self._build_window(current))
+
+        return windows
@@ -17,7 +17,7 @@ from typing import Dict, List, Optional, Any, Union
 
 from clsConfigClient import clsConfigClient as cf
 import clsMCPBroker
-from clsLanguageDetector import clsLanguageDetector
+from clsLanguageDetector import get_language_detector
 from clsTranslationService import clsTranslationService
 from clsMCPMessage import clsMCPMessage
 
@@ -33,21 +33,14 @@ class clsTranslationAgent:
         self.broker = broker
         self.broker.register_agent(agent_id)
         
-        # Initialize language detector
-        self.language_detector = clsLanguageDetector()
+        # Shared, lazily loaded language detector
+        self.language_detector = get_language_detector()
         
         # Initialize translation service
         self.translation_service = clsTranslationService()
     
-    def process_text(self, text, conversation_id=None):
-        """Process text: detect language and translate if needed, handling mixed language content"""
-        if not conversation_id:
-            conversation_id = str(uuid.uuid4())
-        
-        # Detect language with support for mixed language content
-        language_info = self.language_detector.detect(text)
-        
-        # Decide if translation is needed
+    def needs_translation(self, language_info):
+        """Decide if translation is needed for the detected language info"""
         needs_translation = True
         
         # Pure English content doesn't need translation
@@ -65,10 +58,11 @@ class clsTranslationAgent:
             if english_langs and english_langs[0].get("confidence", 0) > 0.6:
                 needs_translation = False
         
-        if needs_translation:
-            # Translate using the appropriate service based on language detection
-            translation_result = self.translation_service.translate(text, language_info)
-            
+        return needs_translation
+    
+    def _build_result(self, text, language_info, translation_result, conversation_id):
+        """Assemble the response for a processed text"""
+        if translation_result is not None:
             return {
                 "original_text": text,
                 "language": language_info,
@@ -86,17 +80,69 @@ class clsTranslationAgent:
                 "conversation_id": conversation_id
             }
     
+    def process_text(self, text, conversation_id=None):
+        """Process text: detect language and translate if needed, handling mixed language content"""
+        if not conversation_id:
+            conversation_id = str(uuid.uuid4())
+        
+        # Detect language with support for mixed language content
+        language_info = self.language_detector.detect(text)
+        
+        translation_result = None
+        if self.needs_translation(language_info):
+            # Translate using the appropriate service based on language detection
+            translation_result = self.translation_service.translate(text, language_info)
+        
+        return self._build_result(text, language_info, translation_result, conversation_id)
+    
+    def process_batch(self, texts, conversation_id=None, language_profile=None):
+        """Process many texts at once, translating all that need it in batched provider requests"""
+        if not conversation_id:
+            conversation_id = str(uuid.uuid4())
+        
+        if language_profile and language_profile.get("uniform"):
+            # Monolingual transcript - the profile stands in for per-text detection
+            language_infos = [language_profile["language_info"]] * len(texts)
+        else:
+            # One parallel detection pass for the whole batch
+            language_infos = self.language_detector.detect_batch(texts)
+        
+        # Only the texts that need translation are sent to the providers
+        pending = [idx for idx, language_info in enumerate(language_infos) if self.needs_translation(language_info)]
+        translations = self.translation_service.translate_batch(
+            [texts[idx] for idx in pending],
+            [language_infos[idx] for idx in pending]
+        )
+        
+        translation_results = [None] * len(texts)
+        for idx, translation_result in zip(pending, translations):
+            translation_results[idx] = translation_result
+        
+        return [
+            self._build_result(text, language_info, translation_result, conversation_id)
+            for text, language_info, translation_result in zip(texts, language_infos, translation_results)
+        ]
+    
     def handle_mcp_message(self, message: clsMCPMessage) -> Optional[clsMCPMessage]:
         """Handle an incoming MCP message"""
         if message.message_type == "translation_request":
             # Process translation request from Documentation Agent
-            text = message.content.get("text", "")
-            
-            # Process the text
-            result = self.process_text(text, message.conversation_id)
+            if "texts" in message.content:
+                # Batched request - results are returned in the same order
+                results = self.process_batch(
+                    message.content.get("texts", []),
+                    message.conversation_id,
+                    message.content.get("language_profile")
+                )
+                result = {"results": results}
+            else:
+                text = message.content.get("text", "")
+                
+                # Process the text
+                result = self.process_text(text, message.conversation_id)
             
             # Send translation results back to requester
-            response = clsMCPMessage(
+            response = clsMCPMessage.trusted(
                 sender=self.agent_id,
                 receiver=message.sender,
                 message_type="translation_response",
@@ -113,9 +159,7 @@ class clsTranslationAgent:
     def run(self):
         """Run the agent to listen for MCP messages"""
         print(f"Translation Agent {self.agent_id} is running...")
-        while True:
-            message = self.broker.get_message(self.agent_id, timeout=1)
-            if message:
-                self.handle_mcp_message(message)
-            time.sleep(0.1)
+        
+        # The broker pushes messages to the handler, so an idle agent uses no CPU
+        self.broker.register_handler(self.agent_id, self.handle_mcp_message)
 
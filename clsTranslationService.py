@@ -12,9 +12,15 @@
 ################################################
 
 # Import translation libraries
-import requests
+import hashlib
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 
 from clsConfigClient import clsConfigClient as cf
+from clsProviderTransport import clsProviderTransport
+from clsTwoTierCache import clsTwoTierCache
 
 # Configure API keys - using environment variables directly
 OPENAI_API_KEY = cf.conf["OPEN_AI_KEY"]
@@ -45,11 +51,35 @@ class clsTranslationService:
     def __init__(self):
         # Initialize Sarvam AI client
         self.sarvam_api_key = SARVAM_API_KEY
-        self.sarvam_url = "https://api.sarvam.ai/translate"
+        self.sarvam_url = cf.conf['SARVAM_TRANSLATE_URL']
         
         # Initialize Google Cloud Translation client using simple HTTP requests
         self.google_api_key = GOOGLE_API_KEY
-        self.google_translate_url = "https://translation.googleapis.com/language/translate/v2"
+        self.google_translate_url = cf.conf['GOOGLE_TRANSLATE_URL']
+        
+        # Pooled keep-alive transports, one per provider
+        self.sarvam_transport = clsProviderTransport("sarvam")
+        self.google_transport = clsProviderTransport("google")
+        
+        # Per-provider limits on in-flight requests
+        self.sarvam_concurrency = cf.conf['SARVAM_CONCURRENCY']
+        self.sarvam_limit = threading.BoundedSemaphore(self.sarvam_concurrency)
+        self.google_limit = threading.BoundedSemaphore(cf.conf['GOOGLE_CONCURRENCY'])
+        
+        # Request size limits used when packing batches
+        self.google_batch_max_items = cf.conf['GOOGLE_BATCH_MAX_ITEMS']
+        self.google_batch_max_chars = cf.conf['GOOGLE_BATCH_MAX_CHARS']
+        self.sarvam_batch_max_items = cf.conf['SARVAM_BATCH_MAX_ITEMS']
+        self.sarvam_batch_max_chars = cf.conf['SARVAM_BATCH_MAX_CHARS']
+        
+        # Content addressed translation cache (memory LRU + SQLite under DB_PATH)
+        self.cache = None
+        if cf.conf['TRANSLATION_CACHE_ENABLED'] == 'Y':
+            self.cache = clsTwoTierCache(
+                name="translation_cache",
+                max_items=cf.conf['TRANSLATION_CACHE_MAX_ITEMS'],
+                db_file=cf.conf['TRANSLATION_CACHE_DB']
+            )
     
     def translate_with_sarvam(self, text, source_lang, target_lang="en-IN"):
         """Translate text using Sarvam AI (for Indian languages)"""
@@ -71,7 +101,8 @@ class clsTranslationService:
         }
         
         try:
-            response = requests.post(self.sarvam_url, headers=headers, json=payload)
+            with self.sarvam_limit:
+                response = self.sarvam_transport.post(self.sarvam_url, headers=headers, json=payload)
             if response.status_code == 200:
                 return {"translated_text": response.json().get("translated_text", ""), "provider": "sarvam"}
             else:
@@ -92,7 +123,8 @@ class clsTranslationService:
                 "target": target_lang
             }
             
-            response = requests.post(self.google_translate_url, params=params)
+            with self.google_limit:
+                response = self.google_transport.post(self.google_translate_url, params=params)
             if response.status_code == 200:
                 data = response.json()
                 translation = data.get("data", {}).get("translations", [{}])[0]
@@ -106,11 +138,11 @@ class clsTranslationService:
         except Exception as e:
             return {"error": f"Error calling Google Translation API: {str(e)}", "provider": "google"}
     
-    def translate(self, text, language_info):
-        """Translate text to English based on language detection info"""
+    def route(self, language_info):
+        """Decide the provider & source language for a text, based on language detection info"""
         # If already English or unknown language, return as is
         if language_info["language_code"] == "en-IN" or language_info["language_code"] == "unknown":
-            return {"translated_text": text, "provider": "none"}
+            return ("none", None)
         
         # Handle mixed language content
         if language_info.get("is_mixed", False) and language_info.get("languages", []):
@@ -130,7 +162,7 @@ class clsTranslationService:
             
             if has_english:
                 # Contains English - use Google for full text as it handles code-mixing well
-                return self.translate_with_google(text)
+                return ("google", None)
             elif has_indian:
                 # Contains Indian languages - use Sarvam
                 # Use the highest confidence Indian language as source
@@ -138,23 +170,226 @@ class clsTranslationService:
                 if indian_langs:
                     # Sort by confidence
                     indian_langs.sort(key=lambda x: x.get("confidence", 0), reverse=True)
-                    source_lang = indian_langs[0]["language_code"]
-                    return self.translate_with_sarvam(text, source_lang)
+                    return ("sarvam", indian_langs[0]["language_code"])
                 else:
                     # Fallback to primary language
                     if language_info["is_indian"]:
-                        return self.translate_with_sarvam(text, language_info["language_code"])
+                        return ("sarvam", language_info["language_code"])
                     else:
-                        return self.translate_with_google(text)
+                        return ("google", None)
             else:
                 # No English, no Indian languages - use Google for primary language
-                return self.translate_with_google(text)
+                return ("google", None)
         else:
             # Not mixed language - use standard approach
             if language_info["is_indian"]:
                 # Use Sarvam AI for Indian languages
-                return self.translate_with_sarvam(text, language_info["language_code"])
+                return ("sarvam", language_info["language_code"])
             else:
                 # Use Google for other languages
-                return self.translate_with_google(text)
+                return ("google", None)
+    
+    def cache_key(self, text, provider, source_lang, target_lang="en"):
+        """Content address of a translation - hash of normalized text, languages & provider"""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        raw = "|".join([provider, source_lang or "auto", target_lang, normalized])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def _cache_get(self, text, provider, source_lang):
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache_key(text, provider, source_lang))
+    
+    def _cache_put(self, text, provider, source_lang, result):
+        # Failed calls are never cached, so they get retried next time
+        if self.cache is not None and "error" not in result:
+            self.cache.put(self.cache_key(text, provider, source_lang), result)
+    
+    def get_cache_stats(self):
+        """Translation cache hit/miss/eviction counters"""
+        return self.cache.get_stats() if self.cache is not None else {}
+    
+    def translate(self, text, language_info):
+        """Translate text to English based on language detection info"""
+        provider, source_lang = self.route(language_info)
+        
+        if provider == "none":
+            return {"translated_text": text, "provider": "none"}
+        
+        # Cache hits skip the network entirely
+        cached = self._cache_get(text, provider, source_lang)
+        if cached is not None:
+            return cached
+        
+        if provider == "sarvam":
+            result = self.translate_with_sarvam(text, source_lang)
+        else:
+            result = self.translate_with_google(text)
+        
+        self._cache_put(text, provider, source_lang, result)
+        return result
+    
+    def _pack(self, texts, max_items, max_chars, separator_chars=0):
+        """Split texts into consecutive packs bounded by item count & total characters,
+        counting separator_chars between texts that get joined into one input"""
+        packs = []
+        current = []
+        current_chars = 0
+        
+        for text in texts:
+            if current and (len(current) >= max_items or current_chars + separator_chars + len(text) > max_chars):
+                packs.append(current)
+                current = []
+                current_chars = 0
+            
+            current_chars += len(text) + (separator_chars if current else 0)
+            current.append(text)
+        
+        if current:
+            packs.append(current)
+        
+        return packs
+    
+    def translate_batch_with_google(self, texts, target_lang="en"):
+        """Translate many texts with as few Google Translation API requests as the size limits allow"""
+        if not self.google_api_key:
+            return [{"error": "Google API key not set"} for _ in texts]
+        
+        results = []
+        
+        for pack in self._pack(texts, self.google_batch_max_items, self.google_batch_max_chars):
+            try:
+                # The v2 endpoint accepts a list of q values in one request
+                params = {"key": self.google_api_key}
+                payload = {"q": pack, "target": target_lang}
+                
+                with self.google_limit:
+                    response = self.google_transport.post(self.google_translate_url, params=params, json=payload)
+                if response.status_code == 200:
+                    translations = response.json().get("data", {}).get("translations", [])
+                    for idx in range(len(pack)):
+                        translation = translations[idx] if idx < len(translations) else {}
+                        results.append({
+                            "translated_text": translation.get("translatedText", ""),
+                            "detected_source_language": translation.get("detectedSourceLanguage", ""),
+                            "provider": "google"
+                        })
+                else:
+                    results.extend([{"error": f"Google API error: {response.text}", "provider": "google"} for _ in pack])
+            except Exception as e:
+                results.extend([{"error": f"Error calling Google Translation API: {str(e)}", "provider": "google"} for _ in pack])
+        
+        return results
+    
+    def _split_text(self, text, max_chars):
+        """Cut a text longer than max_chars into pieces, at sentence ends where possible, else at spaces"""
+        if len(text) <= max_chars:
+            return [text]
+        
+        pieces = []
+        current = ""
+        for sentence in re.split(r'(?<=[.!?।॥])\s+', text):
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                pieces.append(current)
+                current = ""
+            
+            # A single sentence over the limit is cut at the last space that fits
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars + 1)
+                if cut <= 0:
+                    cut = max_chars
+                pieces.append(sentence[:cut].rstrip())
+                sentence = sentence[cut:].lstrip()
+            
+            current = f"{current} {sentence}" if current else sentence
+        
+        if current:
+            pieces.append(current)
+        
+        return pieces
+    
+    def _translate_sarvam_pack(self, pack, source_lang, target_lang):
+        """Translate one pack of lines with a single Sarvam request where the line structure survives"""
+        if len(pack) == 1:
+            return [self.translate_with_sarvam(pack[0], source_lang, target_lang)]
+        
+        packed = self.translate_with_sarvam("\n".join(pack), source_lang, target_lang)
+        translated_lines = packed.get("translated_text", "").split("\n") if "error" not in packed else []
+        
+        if len(translated_lines) == len(pack):
+            return [{"translated_text": line.strip(), "provider": "sarvam"} for line in translated_lines]
+        
+        # Line structure wasn't preserved, translate this pack one text at a time
+        return [self.translate_with_sarvam(line, source_lang, target_lang) for line in pack]
+    
+    def translate_batch_with_sarvam(self, texts, source_lang, target_lang="en-IN"):
+        """Translate many texts with Sarvam AI by packing them as lines of one input"""
+        if not self.sarvam_api_key:
+            return [{"error": "Sarvam API key not set"} for _ in texts]
+        
+        # Line breaks are used as the separator inside a packed input; texts over the
+        # request limit (e.g. long windows) are cut into pieces & joined back after translation
+        pieces = []
+        owners = []
+        for idx, text in enumerate(texts):
+            for piece in self._split_text(" ".join(text.splitlines()), self.sarvam_batch_max_chars):
+                pieces.append(piece)
+                owners.append(idx)
+        
+        packs = self._pack(pieces, self.sarvam_batch_max_items, self.sarvam_batch_max_chars, separator_chars=1)
+        
+        # Packs go out in parallel - sarvam_limit still caps the requests in flight
+        if len(packs) > 1:
+            with ThreadPoolExecutor(max_workers=self.sarvam_concurrency) as executor:
+                pack_results = list(executor.map(lambda pack: self._translate_sarvam_pack(pack, source_lang, target_lang), packs))
+        else:
+            pack_results = [self._translate_sarvam_pack(pack, source_lang, target_lang) for pack in packs]
+        
+        piece_results = [[] for _ in texts]
+        for owner, result in zip(owners, [result for results in pack_results for result in results]):
+            piece_results[owner].append(result)
+        
+        results = []
+        for parts in piece_results:
+            errors = [part for part in parts if "error" in part]
+            if len(parts) == 1 or errors:
+                results.append(errors[0] if errors else parts[0])
+            else:
+                results.append({"translated_text": " ".join(part["translated_text"] for part in parts), "provider": "sarvam"})
+        
+        return results
+    
+    def translate_batch(self, texts, language_infos):
+        """Translate many texts, grouping them by provider & source language; results keep input order"""
+        results = [None] * len(texts)
+        groups = {}
+        
+        for idx, (text, language_info) in enumerate(zip(texts, language_infos)):
+            provider, source_lang = self.route(language_info)
+            
+            # Cache hits skip the network entirely
+            if provider != "none":
+                cached = self._cache_get(text, provider, source_lang)
+                if cached is not None:
+                    results[idx] = cached
+                    continue
+            
+            groups.setdefault((provider, source_lang), []).append(idx)
+        
+        for (provider, source_lang), indices in groups.items():
+            group_texts = [texts[idx] for idx in indices]
+            
+            if provider == "sarvam":
+                group_results = self.translate_batch_with_sarvam(group_texts, source_lang)
+            elif provider == "google":
+                group_results = self.translate_batch_with_google(group_texts)
+            else:
+                group_results = [{"translated_text": text, "provider": "none"} for text in group_texts]
+            
+            for idx, result in zip(indices, group_results):
+                results[idx] = result
+                if provider != "none":
+                    self._cache_put(texts[idx], provider, source_lang, result)
+        
+        return results
 
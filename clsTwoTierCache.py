@@ -0,0 +1,115 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script is a one of the ####
+#### importtant agent that is part of the   ####
+#### MCP protocols for multiple agents &    ####
+#### the coordination with the other agents.####
+####                                        ####
+################################################
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# Two-Tier Cache (in-memory LRU backed by SQLite)
+# ----------------------------------------------------------------------------------
+
+class clsTwoTierCache:
+    """Size bounded in-memory LRU in front of a persistent SQLite key/value store"""
+
+    def __init__(self, name: str, max_items: int, db_file: Optional[str] = None, ttl_seconds: Optional[float] = None):
+        self.name = name
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+
+        self.lock = threading.Lock()
+        self.memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0, "writes": 0}
+
+        # Disk tier is optional - without a file name the cache is memory only
+        self.db = None
+        if db_file:
+            os.makedirs(cf.conf['DB_PATH'], exist_ok=True)
+            self.db = sqlite3.connect(os.path.join(cf.conf['DB_PATH'], db_file), check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.name} (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self.db.commit()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def _remember(self, key: str, value: Any, created: float) -> None:
+        """Insert into the LRU tier, evicting the least recently used entries (lock held)"""
+        self.memory[key] = (value, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_items:
+            self.memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a key in memory first, then on disk"""
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1]):
+                    self.memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                del self.memory[key]
+                self.stats["expired"] += 1
+
+            if self.db is not None:
+                row = self.db.execute(f"SELECT value, created FROM {self.name} WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if not self._expired(row[1]):
+                        value = json.loads(row[0])
+                        self._remember(key, value, row[1])
+                        self.stats["disk_hits"] += 1
+                        return value
+                    self.db.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+                    self.db.commit()
+                    self.stats["expired"] += 1
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON serialisable value in both tiers"""
+        created = time.time()
+        with self.lock:
+            self._remember(key, value, created)
+            self.stats["writes"] += 1
+
+            if self.db is not None:
+                self.db.execute(
+                    f"INSERT OR REPLACE INTO {self.name} (key, value, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), created)
+                )
+                self.db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current sizes, used to size the cache"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["memory_items"] = len(self.memory)
+            stats["max_items"] = self.max_items
+            if self.db is not None:
+                stats["disk_items"] = self.db.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,199 @@
+################################################
+####                                        ####
+#### Written By: SATYAKI DE                 ####
+#### Written On:  15-May-2020               ####
+#### Modified On: 18-Oct-2026               ####
+####                                        ####
+#### Objective: This script caches the      ####
+#### processed result of each YouTube video ####
+#### so repeated requests don't run the     ####
+#### whole pipeline again.                  ####
+####                                        ####
+################################################
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from clsTwoTierCache import clsTwoTierCache
+from clsConfigClient import clsConfigClient as cf
+
+# ----------------------------------------------------------------------------------
+# Per-Video Result Cache
+# ----------------------------------------------------------------------------------
+
+class clsVideoFlight:
+    """One run of a video in flight - its progress events are kept so callers waiting on it see them too"""
+
+    def __init__(self):
+        self.events: List[Tuple[tuple, Dict[str, Any]]] = []
+        self.done = False
+        self.result = None
+        self.error: Optional[Exception] = None
+        self.changed = threading.Condition()
+
+    def publish(self, args: tuple, kwargs: Dict[str, Any]) -> None:
+        with self.changed:
+            self.events.append((args, kwargs))
+            self.changed.notify_all()
+
+    def finish(self, result: Any = None, error: Optional[Exception] = None) -> None:
+        with self.changed:
+            self.result = result
+            self.error = error
+            self.done = True
+            self.changed.notify_all()
+
+    def follow(self, progress: Callable[..., None]) -> Any:
+        """Forward every event of the run to progress, from its start, then return its result"""
+        cursor = 0
+        while True:
+            with self.changed:
+                while cursor == len(self.events) and not self.done:
+                    self.changed.wait()
+                events = self.events[cursor:]
+                cursor = len(self.events)
+                done = self.done
+
+            # Forwarded outside the lock, so a slow job store never holds up the run
+            for args, kwargs in events:
+                try:
+                    progress(*args, **kwargs)
+                except Exception as e:
+                    print(f"Warning: couldn't forward progress event: {str(e)}")
+
+            if done and cursor == len(self.events):
+                if self.error is not None:
+                    raise self.error
+                return self.result
+
+class clsVideoResultCache:
+    """Video results keyed by video ID, transcript version & pipeline config, with one run per video at a time"""
+
+    def __init__(self, pipeline_config: Dict[str, Any]):
+        # Any change to the settings that shape the output gives new cache keys
+        self.pipeline_version = hashlib.sha1(
+            json.dumps(pipeline_config, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+
+        # Results: a few in memory, the rest spilled to SQLite under DB_PATH, all expiring after the TTL
+        self.results = clsTwoTierCache(
+            name="video_results",
+            max_items=cf.conf['VIDEO_CACHE_MAX_ITEMS'],
+            db_file=cf.conf['VIDEO_CACHE_DB'],
+            ttl_seconds=cf.conf['VIDEO_CACHE_TTL_SECONDS']
+        )
+
+        # Latest transcript version seen per video - trusted without refetching the transcript for a while
+        self.latest = clsTwoTierCache(
+            name="video_latest",
+            max_items=cf.conf['VIDEO_CACHE_MAX_ITEMS'] * 10,
+            ttl_seconds=cf.conf['VIDEO_CACHE_REVALIDATE_SECONDS']
+        )
+
+        # Concurrent requests for a video wait on the single run in flight & get its events
+        self.flights: Dict[str, clsVideoFlight] = {}
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "errors": 0}
+
+    def _key(self, video_id: str, transcript_version: str) -> str:
+        return f"{video_id}:{transcript_version}:{self.pipeline_version}"
+
+    def _put(self, key: str, result: Dict[str, Any]) -> None:
+        try:
+            self.results.put(key, result)
+        except (TypeError, ValueError) as e:
+            print(f"Warning: video result {key} couldn't be stored on disk: {str(e)}")
+
+    def _is_complete(self, result: Dict[str, Any]) -> bool:
+        """False when any segment failed translation or documentation - e.g. during a provider outage"""
+        for segment in result.get("processed_segments", []):
+            translation_info = segment.get("translation_info") or {}
+            if "error" in translation_info or "error" in (translation_info.get("translation") or {}):
+                return False
+
+        for segment in (result.get("documentation") or {}).get("processed_segments", []):
+            if "error" in segment:
+                return False
+
+        return True
+
+    def get_or_process(self, video_id: str,
+                       fetch_transcript: Callable[[Callable[..., None]], Dict[str, Any]],
+                       transcript_version: Callable[[Dict[str, Any]], str],
+                       process: Callable[[Dict[str, Any], Callable[..., None]], Dict[str, Any]],
+                       progress: Optional[Callable[..., None]] = None) -> Tuple[Dict[str, Any], bool]:
+        """Return (result, from_cache) for the video, processing its transcript only when needed.
+
+        fetch_transcript & process get a progress(stage, done, total, event=...) callback;
+        callers that join a run in flight get its events passed to their own progress.
+        """
+        progress = progress or (lambda *args, **kwargs: None)
+        flight_key = f"{video_id}:{self.pipeline_version}"
+
+        with self.lock:
+            flight = self.flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = clsVideoFlight()
+                self.flights[flight_key] = flight
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            # Raises the leader's exception too - every waiter sees the same outcome
+            return flight.follow(progress)
+
+        def broadcast(*args, **kwargs) -> None:
+            progress(*args, **kwargs)
+            flight.publish(args, kwargs)
+
+        def resolve() -> Tuple[Dict[str, Any], bool]:
+            # Seen recently - serve the cached result without touching YouTube
+            version = self.latest.get(video_id)
+            if version is not None:
+                result = self.results.get(self._key(video_id, version))
+                if result is not None:
+                    return result, True
+
+            transcript_result = fetch_transcript(broadcast)
+            if "error" in transcript_result:
+                return {"error": transcript_result["error"]}, False
+
+            # A new or edited transcript gets a new key, so stale results are never served
+            version = transcript_version(transcript_result)
+            key = self._key(video_id, version)
+            result = self.results.get(key)
+            from_cache = result is not None
+
+            if not from_cache:
+                result = process(transcript_result, broadcast)
+                # Failures aren't cached, so the next request tries again
+                if "error" in result or not self._is_complete(result):
+                    return result, False
+                self._put(key, result)
+
+            self.latest.put(video_id, version)
+            return result, from_cache
+
+        try:
+            value = resolve()
+        except Exception as e:
+            with self.lock:
+                self.flights.pop(flight_key, None)
+                self.stats["errors"] += 1
+            flight.finish(error=e)
+            raise
+
+        with self.lock:
+            self.flights.pop(flight_key, None)
+        flight.finish(result=value)
+        return value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Result cache counters plus how many requests were coalesced onto a run in flight"""
+        with self.lock:
+            coalescing = dict(self.stats, inflight=len(self.flights))
+        return {"results": self.results.get_stats(), "coalescing": coalescing}
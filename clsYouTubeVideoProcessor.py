@@ -11,13 +11,21 @@
 ####                                        ####
 ################################################
 
+import hashlib
+import os
 import re
+import socket
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Optional, Any, Union
 
 # Import YouTube transcript API
 from youtube_transcript_api import YouTubeTranscriptApi
 
 from clsConfigClient import clsConfigClient as cf
+from clsTranscriptWindower import clsTranscriptWindower
+from clsMCPMessage import clsMCPMessage
+from clsVideoResultCache import clsVideoResultCache
 
 # ----------------------------------------------------------------------------------
 # YouTube Transcript Extraction
@@ -84,17 +92,179 @@ class clsYouTubeVideoProcessor:
         self.documentation_agent = documentation_agent
         self.translation_agent = translation_agent
         self.research_agent = research_agent
+        
+        # Caption windowing policy comes from the config
+        self.windower = clsTranscriptWindower()
+        
+        # Concurrency settings for the translation fan-out
+        self.concurrent_mode = cf.conf['CONCURRENT_MODE'] == 'Y'
+        self.translation_concurrency = cf.conf['TRANSLATION_CONCURRENCY']
+        self.translation_batch_size = cf.conf['TRANSLATION_BATCH_SIZE']
+        
+        # Translation requests can go through the broker to a pool of translation agents.
+        # Replies go to the sender, so each API process gets its own id & reply stream -
+        # with a shared Redis backend another process could otherwise take the reply.
+        self.agent_id = f"video_processor:{socket.gethostname()}-{os.getpid()}"
+        self.broker = translation_agent.broker
+        self.translation_via_broker = cf.conf['TRANSLATION_VIA_BROKER'] == 'Y'
+        self.translation_timeout = cf.conf['BROKER_REQUEST_TIMEOUT']
+        
+        # Requests in flight at once - no more than the agent handles, so none wait out their timeout in its queue
+        self.translation_window = cf.conf['BROKER_AGENT_CONCURRENCY']
+        
+        # Finished videos are cached per transcript version & pipeline config
+        self.result_cache = None
+        if cf.conf['VIDEO_CACHE_ENABLED'] == 'Y':
+            pipeline_config = {key: cf.conf[key] for key in cf.conf['VIDEO_CACHE_PIPELINE_KEYS']}
+            pipeline_config["documentation_model"] = [documentation_agent.model, documentation_agent.temperature]
+            self.result_cache = clsVideoResultCache(pipeline_config)
+    
+    def _standardize_segment(self, segment, idx):
+        """Extract text, start & duration from a raw transcript entry"""
+        # Extract text properly based on the type
+        if isinstance(segment, dict) and "text" in segment:
+            text = segment["text"]
+            start = segment.get("start", 0)
+            duration = segment.get("duration", 0)
+        else:
+            # Try to access attributes for non-dict types
+            try:
+                text = segment.text
+                start = getattr(segment, "start", 0)
+                duration = getattr(segment, "duration", 0)
+            except AttributeError:
+                # If all else fails, convert to string
+                text = str(segment)
+                start = idx * 5  # Arbitrary timestamp
+                duration = 5
+        
+        return {"text": text, "start": start, "duration": duration}
+    
+    def _request_translation(self, windows, conversation_id, language_profile=None):
+        """Send a batch of windows to the translation agents as a translation_request"""
+        message = clsMCPMessage.trusted(
+            sender=self.agent_id,
+            receiver=self.translation_agent.agent_id,
+            message_type="translation_request",
+            content={
+                "texts": [window["text"] for window in windows],
+                "language_profile": language_profile
+            },
+            conversation_id=conversation_id,
+            metadata={"priority": "bulk"}
+        )
+        
+        try:
+            return self.broker.request(message, timeout=self.translation_timeout)
+        except Exception as e:
+            failed = Future()
+            failed.set_exception(e)
+            return failed
+    
+    def _translate_windows(self, windows, conversation_id, language_profile=None, reply=None):
+        """Detect language & translate a batch of windows, keeping failures local to the batch"""
+        texts = [window["text"] for window in windows]
+        
+        try:
+            if reply is not None:
+                # Wait for the translation agent's reply to our request
+                translation_results = reply.result().content["results"]
+            else:
+                # Process through translation agent in as few provider requests as possible
+                translation_results = self.translation_agent.process_batch(texts, conversation_id, language_profile)
+        except Exception as e:
+            print(f"Debug - Error translating windows from {windows[0]['start']}: {str(e)}")
+            translation_results = [
+                {"error": f"Error translating segment: {str(e)}", "final_text": text} for text in texts
+            ]
+        
+        segments_with_translation = []
+        
+        for window, text, translation_result in zip(windows, texts, translation_results):
+            # Update window with translation information
+            segment_with_translation = {
+                **window,
+                "translation_info": translation_result
+            }
+            
+            # Use translated text for documentation
+            if "final_text" in translation_result and translation_result["final_text"] != text:
+                segment_with_translation["processed_text"] = translation_result["final_text"]
+            else:
+                segment_with_translation["processed_text"] = text
+            
+            segments_with_translation.append(segment_with_translation)
+        
+        return segments_with_translation
+    
+    def transcript_version(self, transcript_result):
+        """Hash of a transcript's language & caption lines - it changes when YouTube's transcript does"""
+        digest = hashlib.sha1(f"{transcript_result['language']}|{transcript_result.get('auto_generated')}".encode("utf-8"))
+        
+        transcript_data = transcript_result["text"]
+        if isinstance(transcript_data, list) or hasattr(transcript_data, "snippets"):
+            for idx, segment in enumerate(transcript_data):
+                std_segment = self._standardize_segment(segment, idx)
+                digest.update(f"\n{std_segment['start']}|{std_segment['text']}".encode("utf-8"))
+        else:
+            digest.update(str(transcript_data).encode("utf-8"))
+        
+        return digest.hexdigest()
     
-    def process_youtube_video(self, youtube_url):
-        """Process a YouTube video"""
+    def process_youtube_video(self, youtube_url, progress=None):
+        """Process a YouTube video, reporting progress(stage, done, total, event=...) along the way"""
         print(f"Processing YouTube video: {youtube_url}")
+        progress = progress or (lambda *args, **kwargs: None)
         
-        # Extract transcript
-        transcript_result = get_youtube_transcript(youtube_url)
+        def fetch_transcript(progress):
+            # Extract transcript
+            progress("transcript", 0, 1)
+            return get_youtube_transcript(youtube_url)
         
-        if "error" in transcript_result:
-            return {"error": transcript_result["error"]}
+        video_id = extract_youtube_id(youtube_url)
+        if self.result_cache is None or not video_id:
+            transcript_result = fetch_transcript(progress)
+            if "error" in transcript_result:
+                return {"error": transcript_result["error"]}
+            return self._process_transcript_result(youtube_url, transcript_result, progress)
         
+        # Repeats come from the cache; concurrent requests for the video share one run & its events
+        result, from_cache = self.result_cache.get_or_process(
+            video_id,
+            fetch_transcript,
+            self.transcript_version,
+            lambda transcript_result, progress: self._process_transcript_result(youtube_url, transcript_result, progress),
+            progress
+        )
+        
+        if "error" in result:
+            return result
+        
+        if from_cache:
+            print(f"Debug - Serving cached result for video {video_id}")
+            self._replay_events(result, progress)
+        
+        # The cached entry may have been made from another URL form of the same video
+        return dict(result, youtube_url=youtube_url, cached=from_cache)
+    
+    def _replay_events(self, result, progress):
+        """Send a cached result as the events a fresh run would have sent"""
+        progress("cached", 0, 1)
+        progress("translation", 1, 1, event={"segments": result["processed_segments"]})
+        
+        documented = result["documentation"]["processed_segments"]
+        for idx, segment in enumerate(documented, 1):
+            progress("documentation", idx, len(documented), event={"segment": segment})
+        
+        progress("summary", 1, 1, event={"summary": result["documentation"]["summary"]})
+    
+    def _end_conversation(self, conversation_id):
+        """Release everything kept for a finished video's conversation"""
+        self.documentation_agent.end_processing(conversation_id)
+        self.broker.close_conversation(conversation_id)
+    
+    def _process_transcript_result(self, youtube_url, transcript_result, progress):
+        """Run the translation & documentation pipeline over a fetched transcript"""
         # Start a new conversation
         conversation_id = self.documentation_agent.start_processing()
         
@@ -104,88 +274,83 @@ class clsYouTubeVideoProcessor:
         
         print(f"Debug - Type of transcript_data: {type(transcript_data)}")
         
-        # For each segment, detect language and translate if needed
-        processed_segments = []
+        # Standardize the raw caption lines
+        std_segments = []
         
         try:
             # Make sure transcript_data is a list of dictionaries with text and start fields
-            if isinstance(transcript_data, list):
+            if isinstance(transcript_data, list) or hasattr(transcript_data, "snippets"):
                 for idx, segment in enumerate(transcript_data):
-                    print(f"Debug - Processing segment {idx}, type: {type(segment)}")
-                    
-                    # Extract text properly based on the type
-                    if isinstance(segment, dict) and "text" in segment:
-                        text = segment["text"]
-                        start = segment.get("start", 0)
-                    else:
-                        # Try to access attributes for non-dict types
-                        try:
-                            text = segment.text
-                            start = getattr(segment, "start", 0)
-                        except AttributeError:
-                            # If all else fails, convert to string
-                            text = str(segment)
-                            start = idx * 5  # Arbitrary timestamp
-                    
-                    print(f"Debug - Extracted text: {text[:30]}...")
-                    
-                    # Create a standardized segment
-                    std_segment = {
-                        "text": text,
-                        "start": start
-                    }
-                    
-                    # Process through translation agent
-                    translation_result = self.translation_agent.process_text(text, conversation_id)
-                    
-                    # Update segment with translation information
-                    segment_with_translation = {
-                        **std_segment,
-                        "translation_info": translation_result
-                    }
-                    
-                    # Use translated text for documentation
-                    if "final_text" in translation_result and translation_result["final_text"] != text:
-                        std_segment["processed_text"] = translation_result["final_text"]
-                    else:
-                        std_segment["processed_text"] = text
-                    
-                    processed_segments.append(segment_with_translation)
+                    std_segments.append(self._standardize_segment(segment, idx))
             else:
                 # If transcript_data is not a list, treat it as a single text block
                 print(f"Debug - Transcript is not a list, treating as single text")
-                text = str(transcript_data)
-                std_segment = {
-                    "text": text,
-                    "start": 0
-                }
-                
-                translation_result = self.translation_agent.process_text(text, conversation_id)
-                segment_with_translation = {
-                    **std_segment,
-                    "translation_info": translation_result
-                }
-                
-                if "final_text" in translation_result and translation_result["final_text"] != text:
-                    std_segment["processed_text"] = translation_result["final_text"]
-                else:
-                    std_segment["processed_text"] = text
-                
-                processed_segments.append(segment_with_translation)
+                std_segments.append({"text": str(transcript_data), "start": 0, "duration": 0})
+            
+            # Merge caption lines into windows so each downstream call covers many lines
+            windows = self.windower.build_windows(std_segments)
+            print(f"Debug - Merged {len(std_segments)} segments into {len(windows)} windows")
+            
+            # Transcript level language profile - per-window detection only runs when it's mixed or uncertain
+            language_profile = self.translation_agent.language_detector.profile_transcript(
+                [window["text"] for window in windows],
+                transcript_language,
+                transcript_result.get("auto_generated", True)
+            )
+            print(f"Debug - Language profile uniform: {language_profile['uniform']}, agreement: {language_profile['agreement']}")
+            
+            # For each batch of windows, detect language and translate if needed
+            batches = [
+                windows[pos:pos + self.translation_batch_size]
+                for pos in range(0, len(windows), self.translation_batch_size)
+            ]
+            progress("translation", 0, len(batches))
+            
+            batch_results = []
+            if self.translation_via_broker:
+                # Keep a window of batches out with the translation agents, sending the next as each reply comes in
+                replies = deque()
+                for batch in batches:
+                    while len(replies) < self.translation_window and len(batch_results) + len(replies) < len(batches):
+                        replies.append(self._request_translation(batches[len(batch_results) + len(replies)], conversation_id, language_profile))
+                    
+                    batch_results.append(self._translate_windows(batch, conversation_id, language_profile, replies.popleft()))
+                    progress("translation", len(batch_results), len(batches), event={"segments": batch_results[-1]})
+            elif self.concurrent_mode and len(batches) > 1:
+                with ThreadPoolExecutor(max_workers=self.translation_concurrency) as executor:
+                    for batch_result in executor.map(
+                        lambda batch: self._translate_windows(batch, conversation_id, language_profile),
+                        batches
+                    ):
+                        batch_results.append(batch_result)
+                        progress("translation", len(batch_results), len(batches), event={"segments": batch_result})
+            else:
+                for batch in batches:
+                    batch_results.append(self._translate_windows(batch, conversation_id, language_profile))
+                    progress("translation", len(batch_results), len(batches), event={"segments": batch_results[-1]})
+            
+            processed_segments = [segment for batch in batch_results for segment in batch]
                 
         except Exception as e:
             print(f"Debug - Error processing transcript: {str(e)}")
+            self._end_conversation(conversation_id)
             return {"error": f"Error processing transcript: {str(e)}"}
         
         # Process the transcript with the documentation agent
-        documentation_result = self.documentation_agent.process_transcript(
-            processed_segments,
-            conversation_id
-        )
+        try:
+            documentation_result = self.documentation_agent.process_transcript(
+                processed_segments,
+                conversation_id,
+                progress
+            )
+        finally:
+            # The video is done - release the agent's memory & the broker's history for it
+            self._end_conversation(conversation_id)
         
         return {
             "youtube_url": youtube_url,
             "transcript_language": transcript_language,
+            "language_profile": language_profile,
             "processed_segments": processed_segments,
             "documentation": documentation_result,
             "conversation_id": conversation_id
@@ -12,8 +12,11 @@
 ####                                        ####
 ################################################
 
-import threading
-from fastapi import FastAPI
+import asyncio
+import queue
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 from clsConfigClient import clsConfigClient as cf
 
@@ -22,6 +25,7 @@ from clsDocumentationAgent import clsDocumentationAgent
 from clsTranslationAgent import clsTranslationAgent
 from clsResearchAgent import clsResearchAgent
 from clsYouTubeVideoProcessor import clsYouTubeVideoProcessor
+from clsJobManager import clsJobManager
 
 # Create a global MCP broker
 mcp_broker = t.clsMCPBroker()
@@ -54,19 +58,19 @@ from realTimeVideoSummaryAssistant import (
 )
 
 # Set up subscriptions
-mcp_broker.subscribe("doc_agent", "research_agent")
-mcp_broker.subscribe("research_agent", "doc_agent")
-mcp_broker.subscribe("doc_agent", "translation_agent")
-mcp_broker.subscribe("translation_agent", "doc_agent")
+for subscriber_id, publisher_id, message_type in cf.conf['BROKER_SUBSCRIPTIONS']:
+    mcp_broker.subscribe(subscriber_id, publisher_id, message_type)
 
-# Start agent threads
-doc_thread = threading.Thread(target=doc_agent.run, daemon=True)
-translation_thread = threading.Thread(target=translation_agent.run, daemon=True)
-research_thread = threading.Thread(target=research_agent.run, daemon=True)
+# Start the agents hosted here - each registers a handler with the broker's dispatcher.
+# With the Redis backend the remaining agents run as separate workers (agentWorker.py).
+for agent in (doc_agent, translation_agent, research_agent):
+    if agent.agent_id in cf.conf['LOCAL_AGENTS']:
+        agent.run()
 
-doc_thread.start()
-translation_thread.start()
-research_thread.start()
+# Replay the broker's write-ahead log in the serving process only (not the reload supervisor)
+@app.on_event("startup")
+def recover_broker():
+    mcp_broker.recover()
 
 
 # Create video processor
@@ -76,66 +80,123 @@ video_processor = clsYouTubeVideoProcessor(
     research_agent
 )
 
+# Remove this process's reply queue, so replies arriving after shutdown aren't kept
+@app.on_event("shutdown")
+def release_reply_queue():
+    mcp_broker.unregister_agent(video_processor.agent_id)
+
+# Background jobs - videos are processed on a bounded worker pool, not on the event loop
+job_manager = clsJobManager()
+
+def run_video_job(youtube_url, progress=None):
+    """Process a video on a job worker & build the task result from it"""
+    resPonse = ""
+    result = video_processor.process_youtube_video(youtube_url, progress=progress)
+    
+    if "error" in result:
+        print(f"Error: {result['error']}")
+        raise RuntimeError(result["error"])
+    
+    # Print summary
+    print("\nVideo Summary:")
+    print(result["documentation"]["summary"])
+    
+    # Print segment analyses
+    print("\nSegment Analyses:")
+    for segment in result["processed_segments"][:3]:  # Show first 3 for brevity
+        print(f"\nTimestamp: {segment.get('start', 0)}")
+        print(f"Text: {segment.get('text', '')}")
+        if "processed_text" in segment and segment["processed_text"] != segment["text"]:
+            print(f"Translated Text: {segment.get('processed_text', '')}")
+        
+        # Find corresponding analysis
+        for proc_segment in result["documentation"]["processed_segments"]:
+            if proc_segment["timestamp"] == segment.get("start", 0):
+                print(f"Analysis: {proc_segment.get('analysis', '')}")
+                resPonse = resPonse + str(proc_segment.get('analysis', ''))
+                break
+    
+    print("\nProcessing complete. Full results are available in the return object.")
+    
+    return {
+        "status": "Success",
+        "YouTube_URL": youtube_url,
+        "Analysis": resPonse,
+        "Summary": result["documentation"]["summary"]
+    }
+
 # API endpoints
+# A plain def runs in the threadpool, so job store calls (e.g. Redis) never block the event loop
 @app.post("/api/processVideo")
-async def processVideo(youtube_url: str):
-    try:
-        """
-        Process a YouTube video and return a task ID.
-        The task will run in the background and results can be fetched using the /api/task/{task_id} endpoint.
-        """
-
-        resPonse = ""
-        youtube_url = youtube_url
-
-        if youtube_url:
-            result = video_processor.process_youtube_video(youtube_url)
-            
-            if "error" in result:
-                print(f"Error: {result['error']}")
-            else:
-                # Print summary
-                print("\nVideo Summary:")
-                print(result["documentation"]["summary"])
-                
-                # Print segment analyses
-                print("\nSegment Analyses:")
-                for segment in result["processed_segments"][:3]:  # Show first 3 for brevity
-                    print(f"\nTimestamp: {segment.get('start', 0)}")
-                    print(f"Text: {segment.get('text', '')}")
-                    if "processed_text" in segment and segment["processed_text"] != segment["text"]:
-                        print(f"Translated Text: {segment.get('processed_text', '')}")
-                    
-                    # Find corresponding analysis
-                    for proc_segment in result["documentation"]["processed_segments"]:
-                        if proc_segment["timestamp"] == segment.get("start", 0):
-                            print(f"Analysis: {proc_segment.get('analysis', '')}")
-                            resPonse = resPonse + str(proc_segment.get('analysis', ''))
-                            break
-                
-                print("\nProcessing complete. Full results are available in the return object.")
-        else:
-            print("No YouTube URL provided.")
-
-        xbuff = {
-            "status": "Success",
+def processVideo(youtube_url: str):
+    """
+    Process a YouTube video and return a task ID.
+    The task will run in the background and results can be fetched using the /api/task/{task_id} endpoint.
+    """
+    if not youtube_url:
+        print("No YouTube URL provided.")
+        return {
+            "status": "Failure",
             "YouTube_URL": youtube_url,
-            "Analysis": resPonse
+            "Analysis": "No YouTube URL provided!"
         }
-        
-        # Return task ID
-        return xbuff
     
-    except Exception as e:
-
-        xbuff = {
+    try:
+        # Returns at once - the worker pool does the processing
+        task_id = job_manager.submit(run_video_job, youtube_url)
+    except queue.Full as e:
+        print(f"Warning: {str(e)}")
+        return {
             "status": "Failure",
             "YouTube_URL": youtube_url,
-            "Analysis": "Failed to process video!"
+            "Analysis": str(e)
         }
-        
-        # Return task ID
-        return xbuff
+    
+    # Return task ID
+    return {
+        "status": "Accepted",
+        "YouTube_URL": youtube_url,
+        "task_id": task_id
+    }
+
+# Task status & progress, for polling
+@app.get("/api/task/{task_id}")
+def getTaskStatus(task_id: str):
+    job = job_manager.get_status(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown task {task_id}")
+    return job
+
+# Task result, once the task is completed (status & error otherwise)
+@app.get("/api/task/{task_id}/result")
+def getTaskResult(task_id: str):
+    job = job_manager.get(task_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown task {task_id}")
+    return {
+        "task_id": task_id,
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"]
+    }
+
+# Server-Sent Events stream of a task - each segment's translation & analysis as it finishes,
+# then the summary. Reconnecting clients resume with Last-Event-ID (or ?offset=).
+# An async endpoint with an async generator - open streams don't tie up threadpool threads
+@app.get("/api/task/{task_id}/stream")
+async def streamTask(task_id: str, request: Request, offset: int = 0):
+    if await asyncio.to_thread(job_manager.get_status, task_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown task {task_id}")
+    
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        offset = int(last_event_id) + 1
+    
+    return StreamingResponse(
+        job_manager.stream_events(task_id, offset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # Root endpoint for basic health/status